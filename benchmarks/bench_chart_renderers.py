@@ -0,0 +1,48 @@
+"""
+Benchmark: svg vs matplotlib chart renderers
+
+Draws the dashboard's line and bar charts for N employees and teams
+with each renderer, bypassing the chart cache, and reports the mean
+render time and image size. The chart data is fetched up front, so
+only the drawing is timed.
+
+Usage:
+    python benchmarks/bench_chart_renderers.py [n_entities]
+
+Defaults to 10 employees and 10 teams.
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'report'))
+
+from employee_events import Employee, Team  # noqa: E402
+from dashboard import LineChart, BarChart  # noqa: E402
+from base_components.chart_renderers import renderers  # noqa: E402
+
+
+def main(n_entities):
+
+    jobs = {}
+    for chart in (LineChart(), BarChart()):
+        jobs[chart] = [
+            chart.component_data(entity_id, model)
+            for model in (Employee(), Team())
+            for _, entity_id in model.names()[:n_entities]
+            ]
+
+    for chart, datasets in jobs.items():
+        for name in ('matplotlib', 'svg'):
+            renderer = renderers[name]
+
+            start = time.perf_counter()
+            images = [renderer.render(chart, data) for data in datasets]
+            elapsed = (time.perf_counter() - start) / len(datasets)
+
+            size = sum(map(len, images)) / len(images)
+            print(f"{type(chart).__name__:<10} {name:<11} {elapsed * 1000:8.2f} ms  {size / 1024:7.1f} KiB")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,60 @@
+"""
+Benchmark: chart rendering on threads vs render processes
+
+Draws the dashboard's line and bar charts for N employees, bypassing
+the chart cache, with
+
+    threads      MatplotlibViz.draw_png on a thread pool (one core, GIL bound)
+    processes    the same drawing on a ProcessRenderer of W workers
+
+The chart data is fetched up front, so only the drawing is timed.
+
+Usage:
+    python benchmarks/bench_chart_rendering.py [n_charts] [workers]
+
+Defaults to 40 charts and one worker per core.
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'report'))
+
+from employee_events import Employee  # noqa: E402
+from dashboard import LineChart, BarChart  # noqa: E402
+from base_components.process_renderer import ProcessRenderer  # noqa: E402
+
+
+def main(n_charts, workers):
+
+    model = Employee()
+    charts = [LineChart(), BarChart()]
+    entity_ids = [entity_id for _, entity_id in model.names()][:n_charts // 2]
+    jobs = [(chart, chart.component_data(entity_id, model)) for entity_id in entity_ids for chart in charts]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lambda job: job[0].draw_png(job[1]), jobs))
+    thread_time = time.perf_counter() - start
+
+    renderer = ProcessRenderer(workers)
+    renderer.warm()
+    try:
+        start = time.perf_counter()
+        [future.result() for future in [renderer.submit(chart, data) for chart, data in jobs]]
+        process_time = time.perf_counter() - start
+    finally:
+        renderer.close()
+
+    print(f"{len(jobs)} charts, {workers} workers")
+    print(f"  threads    {thread_time:7.3f}s  {len(jobs) / thread_time:6.1f} charts/s")
+    print(f"  processes  {process_time:7.3f}s  {len(jobs) / process_time:6.1f} charts/s")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    n_charts = args[0] if args else 40
+    workers = args[1] if len(args) > 1 else os.cpu_count()
+    main(n_charts, workers)
@@ -0,0 +1,77 @@
+"""
+Benchmark: columnar fetch vs pandas.read_sql_query
+
+Builds an in-memory events table of N rows and fetches it as a
+DataFrame with `event_date` parsed to datetime64, using
+
+    read_sql_query    pd.read_sql_query(..., parse_dates=['event_date'])
+    columnar          employee_events.sql_execution.fetch_columns with fixed dtypes
+
+Usage:
+    python benchmarks/bench_columnar_fetch.py [n_rows ...]
+
+Defaults to 10k, 1M and 10M rows (10M needs several GB of memory).
+"""
+import sqlite3
+import sys
+import time
+
+import pandas as pd
+
+from employee_events import QueryBase
+from employee_events.sql_execution import fetch_columns
+
+
+SQL = "SELECT employee_id, event_date, positive_events, negative_events FROM events"
+
+
+def build(n_rows):
+    conn = sqlite3.connect(':memory:')
+    conn.execute(
+        '''CREATE TABLE events AS
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+            SELECT i % 1000 AS employee_id
+                , date('2020-01-01', '+' || (i % 1500) || ' days') AS event_date
+                , i % 7 AS positive_events
+                , i % 5 AS negative_events
+            FROM n''',
+        (n_rows,))
+    return conn
+
+
+def read_sql(conn):
+    return pd.read_sql_query(SQL, conn, parse_dates=['event_date'])
+
+
+def columnar(conn):
+    dtypes = {'employee_id': 'int64', **QueryBase.event_counts_dtypes}
+    return pd.DataFrame(fetch_columns(conn.execute(SQL), dtypes))
+
+
+def best_of(func, conn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(conn)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(sizes):
+
+    for n_rows in sizes:
+        conn = build(n_rows)
+        repeat = 5 if n_rows <= 100_000 else 1
+
+        pandas_time = best_of(read_sql, conn, repeat)
+        columnar_time = best_of(columnar, conn, repeat)
+        conn.close()
+
+        print(
+            f"{n_rows:>10,} rows  read_sql_query {pandas_time:8.3f}s"
+            f"  columnar {columnar_time:8.3f}s  ({pandas_time / columnar_time:4.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [10_000, 1_000_000, 10_000_000])
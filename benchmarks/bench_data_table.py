@@ -0,0 +1,77 @@
+"""
+Benchmark: DataTable rendering of large notes tables
+
+Renders an N-row notes table with
+
+    full      DataTable.build_component + to_xml (the whole FT tree first)
+    stream    DataTable.stream, time to the first chunk and to the end
+    capped    max_rows = 25, the first page only
+
+Usage:
+    python benchmarks/bench_data_table.py [n_rows ...]
+
+Defaults to 100, 10k and 100k rows.
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'report'))
+
+from employee_events import Employee  # noqa: E402
+from fasthtml.common import to_xml  # noqa: E402
+from base_components import DataTable  # noqa: E402
+
+
+class NotesTable(DataTable):
+
+    def __init__(self, notes, max_rows=None):
+        self.notes = notes
+        self.max_rows = max_rows
+
+    def component_data(self, entity_id, model):
+        return self.notes
+
+
+def build_notes(n_rows):
+    dates = pd.date_range('2020-01-01', periods=n_rows, freq='h').strftime('%Y-%m-%d')
+    return pd.DataFrame({
+        'note_date': dates,
+        'note': [f'Note {i}: {"lorem ipsum " * 4}' for i in np.arange(n_rows)],
+        })
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main(sizes):
+
+    for n_rows in sizes:
+        notes = build_notes(n_rows)
+
+        full_time, html = timed(lambda: to_xml(NotesTable(notes)(1, Employee())))
+
+        start = time.perf_counter()
+        chunks = NotesTable(notes).stream(1, Employee())
+        streamed = len(next(chunks)) + len(next(chunks))
+        first_chunk = time.perf_counter() - start
+        streamed += sum(len(chunk) for chunk in chunks)
+        stream_time = time.perf_counter() - start
+
+        capped_time, capped = timed(lambda: to_xml(NotesTable(notes, max_rows=25)(1, Employee())))
+
+        print(
+            f"{n_rows:>8,} rows  full {full_time:7.3f}s ({len(html) / 1024:8.0f} KiB)"
+            f"  stream first chunk {first_chunk:7.3f}s, all {stream_time:7.3f}s ({streamed / 1024:8.0f} KiB)"
+            f"  capped {capped_time:7.3f}s ({len(capped) / 1024:4.0f} KiB)"
+            )
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [100, 10_000, 100_000])
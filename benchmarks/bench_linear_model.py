@@ -0,0 +1,53 @@
+"""
+Benchmark: scikit-learn vs NumPy scoring of the risk model
+
+Times `predict_proba` of the pickled LogisticRegression and of the
+LogisticScorer exported to assets/model.json, for a single row (the
+dashboard's per-request call) and for every employee at once, and
+reports the largest difference between their probabilities.
+
+Usage:
+    python benchmarks/bench_linear_model.py [repeats]
+
+Defaults to 1000 repeats.
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'report'))
+
+from employee_events import Employee  # noqa: E402
+from linear_model import LogisticScorer  # noqa: E402
+from model_serving import FEATURES  # noqa: E402
+from utils import load_model  # noqa: E402
+
+
+def timed(func, features, repeats):
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func(features)
+    return (time.perf_counter() - start) / repeats
+
+
+def main(repeats):
+
+    models = {'sklearn': load_model(), 'numpy': LogisticScorer.from_json()}
+
+    ids = [int(id) for _, id in Employee().names()]
+    batch = Employee().model_data_many(ids)[FEATURES]
+
+    for label, features in (('1 row', batch.iloc[:1]), (f'{len(batch)} rows', batch)):
+        for name, model in models.items():
+            elapsed = timed(model.predict_proba, features, repeats)
+            print(f"{label:<10} {name:<8} {elapsed * 1e6:9.1f} µs")
+
+    difference = np.abs(models['sklearn'].predict_proba(batch) - models['numpy'].predict_proba(batch)).max()
+    print(f"max |difference| {difference:.2e}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
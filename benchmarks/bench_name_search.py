@@ -0,0 +1,62 @@
+"""
+Benchmark: prefix name search
+
+Builds a NameIndex over N synthetic "First Last" names and times a
+top-10 search against a linear scan of the same names.
+
+Usage:
+    python benchmarks/bench_name_search.py [n_names ...]
+
+Defaults to 1k, 10k and 100k names.
+"""
+import random
+import string
+import sys
+import time
+
+from employee_events import NameIndex
+
+
+def random_word(rng):
+    return rng.choice(string.ascii_uppercase) + ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9)))
+
+
+def linear_search(names, query, limit=10):
+    query = query.casefold()
+    matches = [
+        (name, entity_id) for name, entity_id in names
+        if any(word.startswith(query) for word in name.casefold().split())
+        ]
+    return sorted(matches)[:limit]
+
+
+def per_call(func, queries):
+    start = time.perf_counter()
+    for query in queries:
+        func(query)
+    return (time.perf_counter() - start) / len(queries)
+
+
+def main(sizes):
+
+    rng = random.Random(0)
+
+    for n_names in sizes:
+        names = [(f'{random_word(rng)} {random_word(rng)}', entity_id) for entity_id in range(n_names)]
+        queries = [name[:rng.randint(1, 4)] for name, _ in rng.sample(names, 200)]
+
+        start = time.perf_counter()
+        index = NameIndex(names)
+        build_time = time.perf_counter() - start
+
+        index_time = per_call(index.search, queries)
+        scan_time = per_call(lambda query: linear_search(names, query), queries)
+
+        print(
+            f"{n_names:>8,} names  build {build_time * 1000:8.1f} ms"
+            f"  index {index_time * 1e6:8.1f} us  scan {scan_time * 1e6:10.1f} us"
+            )
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [1_000, 10_000, 100_000])
@@ -0,0 +1,66 @@
+"""
+Benchmark: stored vs live recruitment risk
+
+Times `model_server.risk` (one risk_scores row) against
+`model_server.score` (aggregating the events and predicting) for
+every employee and team, with the result cache cleared before each
+call so every call reaches the database. Then times an incremental
+refresh with nothing to do against a full re-score, on a copy of
+the database.
+
+Usage:
+    python benchmarks/bench_risk_scores.py [repeats]
+
+Defaults to 20 repeats.
+"""
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'report'))
+
+from employee_events import Employee, Team, refresh_risk_scores  # noqa: E402
+from employee_events.result_cache import result_cache  # noqa: E402
+from employee_events.sql_execution import db_path  # noqa: E402
+from model_serving import model_server  # noqa: E402
+
+
+def timed(func, ids, model, repeats):
+
+    elapsed = 0.0
+    for _ in range(repeats):
+        for entity_id in ids:
+            result_cache.clear()
+            start = time.perf_counter()
+            func(entity_id, model)
+            elapsed += time.perf_counter() - start
+
+    return elapsed / (repeats * len(ids))
+
+
+def main(repeats):
+
+    # load the model up front
+    model_server.version
+
+    for model in (Employee(), Team()):
+        ids = [entity_id for _, entity_id in model.names()]
+
+        live = timed(lambda entity_id, model: model_server.score([entity_id], model), ids, model, repeats)
+        stored = timed(model_server.risk, ids, model, repeats)
+        print(f"{model.name:<9} live {live * 1000:7.3f} ms  stored {stored * 1000:7.3f} ms")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'employee_events.db'
+        shutil.copy(db_path, path)
+
+        for label, rebuild in (('full refresh', True), ('no-op refresh', False)):
+            start = time.perf_counter()
+            scored = refresh_risk_scores(model_server.predict, model_server.version, path, rebuild=rebuild)
+            print(f"{label:<14} {(time.perf_counter() - start) * 1000:7.2f} ms  ({scored} scored)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
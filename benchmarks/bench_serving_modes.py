@@ -0,0 +1,61 @@
+"""
+Benchmark: database serving modes on the dashboard's query mix
+
+Runs the queries behind one employee page and one team page
+(names, username, event_counts, model_data, first notes page)
+for every employee and team, with the result cache bypassed,
+against each serving mode:
+
+    disk      read-only connections to the database file (default)
+    mmap      read-only connections that memory-map the whole file
+    memory    shared in-memory copy loaded with the backup API
+
+Usage:
+    python benchmarks/bench_serving_modes.py [rounds]
+"""
+import sys
+import time
+
+from employee_events import Employee, Team, sql_execution
+
+
+def uncached(method):
+    # `cached_query` keeps the undecorated method on `__wrapped__`
+    return getattr(method, '__wrapped__', method)
+
+
+def page_queries(model, id):
+    cls = type(model)
+    uncached(cls.names)(model)
+    uncached(cls.username)(model, id)
+    uncached(cls.event_counts)(model, id)
+    uncached(cls.model_data)(model, id)
+    uncached(cls.notes_page)(model, id, 25)
+
+
+def run(rounds):
+    models = [(model, [id for _, id in model.names()]) for model in (Employee(), Team())]
+
+    start = time.perf_counter()
+    pages = 0
+    for _ in range(rounds):
+        for model, ids in models:
+            for id in ids:
+                page_queries(model, id)
+                pages += 1
+
+    return pages, time.perf_counter() - start
+
+
+def main(rounds=20):
+
+    for mode in ('disk', 'mmap', 'memory'):
+        sql_execution.configure(mode=mode)
+        run(1)      # warm up connections and statement caches
+
+        pages, elapsed = run(rounds)
+        print(f"{mode:>7}: {pages} pages in {elapsed:6.3f}s  {elapsed / pages * 1e3:6.2f} ms/page")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
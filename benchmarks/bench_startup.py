@@ -0,0 +1,99 @@
+"""
+Benchmark: dashboard cold start
+
+Imports report/dashboard.py in fresh interpreters with
+`python -X importtime`, and reports the median time spent importing
+it and the packages that took longest. Startup fails the benchmark
+(exit status 1) when the median import time is over the budget, or
+when a package that should only load on first use (matplotlib,
+scikit-learn) is imported at startup.
+
+Usage:
+    python benchmarks/bench_startup.py [runs] [budget_seconds]
+
+Defaults to 5 runs and a 1 second budget.
+"""
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import Counter
+from pathlib import Path
+
+REPORT_DIR = Path(__file__).parent.parent / 'report'
+
+# Packages the dashboard only needs once it draws a matplotlib
+# chart or unpickles a model without a current NumPy export.
+# pandas is not one of them: fasthtml.common imports fastlite,
+# whose sqlite_minutils.db imports pandas whenever it is installed
+LAZY_PACKAGES = ['matplotlib', 'sklearn']
+
+# "import time: self [us] | cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def import_dashboard():
+    """
+    Imports the dashboard once and returns the parsed importtime
+    lines as (cumulative seconds, depth, module) tuples
+    """
+    env = {**os.environ, 'DASHBOARD_MODEL_RELOAD_INTERVAL': '0'}
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import dashboard'],
+        cwd=REPORT_DIR, env=env, capture_output=True, text=True, check=True,
+        )
+
+    imports = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            imports.append((int(match.group(2)) / 1e6, len(match.group(3)) // 2, match.group(4)))
+    return imports
+
+
+def main(runs, budget):
+
+    totals = []
+    packages = Counter()
+    imported = set()
+
+    for _ in range(runs):
+        imports = import_dashboard()
+
+        # a module is listed after everything it imported, so the
+        # dashboard's imports are the nested lines right before it
+        end = next(i for i, (_, _, module) in enumerate(imports) if module == 'dashboard')
+        start = end
+        while start > 0 and imports[start - 1][1] > 0:
+            start -= 1
+
+        totals.append(imports[end][0])
+        for seconds, _, module in imports[start:end]:
+            imported.add(module.split('.')[0])
+            # cumulative time of each top level package
+            if '.' not in module:
+                packages[module] += seconds / runs
+
+    median = statistics.median(totals)
+    print(f"import dashboard  median {median:.3f} s  (min {min(totals):.3f}, max {max(totals):.3f}, {runs} runs)")
+    for module, seconds in packages.most_common(10):
+        print(f"  {module:<20} {seconds:.3f} s")
+
+    failures = []
+    if median > budget:
+        failures.append(f"startup took {median:.3f} s, over the {budget:.3f} s budget")
+    for package in LAZY_PACKAGES:
+        if package in imported:
+            failures.append(f"{package} is imported at startup")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    budget = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    sys.exit(main(runs, budget))
@@ -0,0 +1,62 @@
+"""
+Benchmark: bound parameters with statement reuse vs fresh SQL compilation
+
+Runs the `Employee.username` and `Employee.event_counts` queries
+for thousands of ids three ways:
+
+    reuse       one SQL template with a bound `?` parameter, compiled
+                once and reused from the connection's statement cache
+    no-cache    the same bound template with sqlite3's statement cache
+                disabled, so every call re-prepares the statement
+    f-string    the id formatted into the SQL text (the previous
+                behaviour), so every id is a distinct statement
+
+Usage:
+    python benchmarks/bench_statement_cache.py [n_ids]
+"""
+import sqlite3
+import sys
+import time
+
+from employee_events import Employee
+from employee_events.sql_execution import db_path
+
+
+def connect(cached_statements):
+    uri = f"{db_path.resolve().as_uri()}?mode=ro"
+    return sqlite3.connect(uri, uri=True, cached_statements=cached_statements)
+
+
+def run(conn, ids, render):
+    start = time.perf_counter()
+    for id in ids:
+        sql, params = render(id)
+        conn.execute(sql, params).fetchall()
+    return time.perf_counter() - start
+
+
+def main(n_ids=5000):
+
+    employee = Employee()
+    ids = list(range(1, n_ids + 1))
+
+    for query in ('username_sql', 'event_counts_sql'):
+
+        template = employee.statement(getattr(employee, query))
+
+        cases = {
+            'reuse': (128, lambda id: (template, (id,))),
+            'no-cache': (0, lambda id: (template, (id,))),
+            'f-string': (128, lambda id: (template.replace('?', str(id)), ())),
+            }
+
+        print(f"{query} x {n_ids} ids")
+        for label, (cached_statements, render) in cases.items():
+            conn = connect(cached_statements)
+            elapsed = run(conn, ids, render)
+            conn.close()
+            print(f"{label:>10}: {elapsed:8.3f}s  {elapsed / n_ids * 1e6:8.1f} us/query")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
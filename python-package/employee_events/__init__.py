@@ -1,4 +1,10 @@
-from .sql_execution import *
+from .sql_execution import (
+    QueryMixin, run_async, configure, shutdown, pool_stats, statement_stats, db_path,
+    )
+from .result_cache import LRUCache, ResultCache, cached_query, cache_stats, data_version
+from .rollups import refresh_rollups, rebuild_rollups, rollups_available
+from .risk_scores import refresh_risk_scores, risk_scores_available
+from .name_search import NameIndex, name_index
 from .query_base import QueryBase
 from .employee import Employee
 from .team import Team
@@ -0,0 +1,292 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from queue import LifoQueue, Empty
+
+
+# PRAGMAs applied to every pooled connection.
+# The pool only ever reads, so the connection is locked
+# into query-only mode and given a larger page cache
+# and in-memory temp storage for sorts and GROUP BYs
+READ_PRAGMAS = {
+    'query_only': 'ON',
+    'cache_size': -16000,      # negative value = size in KiB (~16MB)
+    'temp_store': 'MEMORY',
+    'mmap_size': 64 * 1024 * 1024,
+}
+
+# How the pool opens the database
+#   disk     read-only connections to the database file
+#   mmap     read-only connections that memory-map the whole file,
+#            so reads come straight from the OS page cache.
+#            Changes to the file (e.g. a rollup refresh) are seen
+#            as in 'disk' mode
+#   memory   the file copied once (backup API) into a shared
+#            in-memory database that every connection reads.
+#            The copy is a snapshot, changes are only seen by a new pool
+SERVING_MODES = ('disk', 'mmap', 'memory')
+
+# mmap_size used in 'mmap' mode (SQLite caps it at its compile-time maximum)
+MMAP_SIZE = 1024 * 1024 * 1024
+
+
+def file_version(path):
+    """
+    Returns a token that changes whenever the database file changes.
+
+    The token is built from the modification time and size of the
+    database and its write-ahead log, so it also picks up commits made
+    by other processes. (`PRAGMA data_version` only reports changes
+    made through *other* connections and is local to each connection,
+    so it cannot be compared across the pool)
+    """
+    version = []
+    for suffix in ('', '-wal'):
+        try:
+            stat = os.stat(f"{path}{suffix}")
+        except FileNotFoundError:
+            continue
+        version.extend((stat.st_mtime_ns, stat.st_size))
+
+    return tuple(version)
+
+
+class PoolClosedError(RuntimeError):
+    """Raised when a connection is requested from a closed pool"""
+
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """
+    Raised when no connection was released within the pool's timeout.
+    It is an sqlite3 error, so the query methods handle it as they do
+    a locked database
+    """
+
+
+# Handed to the callers waiting on a pool when it is closed
+_CLOSED = object()
+
+
+class ConnectionPool:
+    """
+    Bounded pool of long-lived, read-only sqlite3 connections.
+
+    Connections are opened lazily (up to `max_size`) via a `mode=ro` URI
+    and handed back to the pool after each query instead of being closed.
+    When every connection is in use, callers block until one is returned,
+    raising PoolTimeoutError after `timeout` seconds and PoolClosedError
+    when the pool is closed while they wait.
+
+    `snapshot` is the `file_version` of the database copied into
+    memory in 'memory' mode, and None when the pool reads the file.
+    """
+
+    def __init__(self, db_path, max_size=4, timeout=30.0, pragmas=None, cached_statements=128, mode='disk'):
+
+        if mode not in SERVING_MODES:
+            raise ValueError(f"Unknown serving mode {mode!r}, expected one of {SERVING_MODES}")
+
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self.mode = mode
+        self.pragmas = dict(READ_PRAGMAS if pragmas is None else pragmas)
+
+        if mode == 'mmap':
+            self.pragmas['mmap_size'] = MMAP_SIZE
+
+        # In 'memory' mode this connection holds the shared
+        # in-memory database open for the life of the pool
+        self._memory_name = None
+        self._anchor = None
+        self.snapshot = None
+        if mode == 'memory':
+            # taken before the copy, a change made during it
+            # gives the file a newer version than the snapshot
+            self.snapshot = file_version(db_path)
+            self._anchor = self._load_into_memory()
+
+        self._idle = LifoQueue()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._waiting = 0
+
+        self._stats = {
+            'hits': 0,          # connection reused from the pool
+            'opens': 0,         # new connection opened
+            'waits': 0,         # caller had to wait for a free connection
+            'wait_time': 0.0,   # total seconds spent waiting
+            }
+
+    def _uri(self):
+
+        if self.mode == 'memory':
+            return f"file:{self._memory_name}?mode=memory&cache=shared"
+
+        return f"{self.db_path.resolve().as_uri()}?mode=ro"
+
+    def _load_into_memory(self):
+
+        self._memory_name = f"employee_events_{id(self)}"
+        anchor = sqlite3.connect(
+            f"file:{self._memory_name}?mode=memory&cache=shared",
+            uri=True,
+            check_same_thread=False,
+            )
+
+        source = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            source.backup(anchor)
+        finally:
+            source.close()
+
+        return anchor
+
+    def _open(self):
+
+        uri = self._uri()
+
+        # check_same_thread is disabled because a connection
+        # may be returned to the pool and reused by another thread.
+        # The pool guarantees only one thread holds it at a time
+        conn = sqlite3.connect(
+            uri,
+            uri=True,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+            )
+
+        for pragma, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
+
+        return conn
+
+    def acquire(self):
+        """
+        Returns an idle connection, opening a new one
+        if the pool is not yet full
+        """
+
+        if self._closed:
+            raise PoolClosedError("The connection pool has been closed")
+
+        try:
+            conn = self._idle.get_nowait()
+            with self._lock:
+                self._stats['hits'] += 1
+            return conn
+
+        except Empty:
+            pass
+
+        with self._lock:
+            can_open = len(self._connections) < self.max_size
+            if can_open:
+                # reserve the slot before opening, outside the lock
+                self._connections.append(None)
+
+        if can_open:
+            try:
+                conn = self._open()
+            except Exception:
+                with self._lock:
+                    self._connections.remove(None)
+                raise
+
+            with self._lock:
+                self._connections[self._connections.index(None)] = conn
+                self._stats['opens'] += 1
+            return conn
+
+        # pool is exhausted, wait for another caller to release
+        with self._lock:
+            self._waiting += 1
+
+        start = time.perf_counter()
+        try:
+            # `close` only wakes the callers it counted as waiting
+            if self._closed:
+                raise PoolClosedError("The connection pool has been closed")
+            conn = self._idle.get(timeout=self.timeout)
+        except Empty:
+            raise PoolTimeoutError(f"No database connection was free within {self.timeout} seconds") from None
+        finally:
+            waited = time.perf_counter() - start
+            with self._lock:
+                self._waiting -= 1
+                self._stats['waits'] += 1
+                self._stats['wait_time'] += waited
+
+        if conn is _CLOSED or self._closed:
+            if conn is not _CLOSED:
+                conn.close()
+            raise PoolClosedError("The connection pool has been closed")
+
+        with self._lock:
+            self._stats['hits'] += 1
+        return conn
+
+    def release(self, conn):
+        """Returns a connection to the pool"""
+
+        if self._closed:
+            conn.close()
+            return
+
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Context manager that borrows a connection from the pool"""
+
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self):
+        """Returns a snapshot of the pool counters"""
+
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._connections)
+
+        stats['idle'] = self._idle.qsize()
+        return stats
+
+    def close(self):
+        """
+        Closes every idle connection and marks the pool closed.
+        Connections still checked out are closed when released,
+        and callers waiting for one raise PoolClosedError.
+        """
+
+        self._closed = True
+
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except Empty:
+                break
+            if conn is not _CLOSED:
+                conn.close()
+
+        with self._lock:
+            self._connections = []
+            waiting = self._waiting
+
+        for _ in range(waiting):
+            self._idle.put(_CLOSED)
+
+        if self._anchor is not None:
+            self._anchor.close()
+            self._anchor = None
+
+    @property
+    def closed(self):
+        return self._closed
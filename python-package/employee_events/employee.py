@@ -1,5 +1,5 @@
 # Import the QueryBase class
-from employee_events import QueryBase
+from employee_events import QueryBase, cached_query, rollups_available
 
 # Import dependencies needed for sql execution
 
@@ -12,11 +12,66 @@ class Employee(QueryBase):
     # to the string "employee"
     name = 'employee'
 
+    # SQL templates rendered with the `name` class attribute
+    names_sql = """
+                        SELECT first_name || ' ' || last_name AS full_name, employee_id
+                        FROM {name}
+                    """
+
+    username_sql = """
+                        SELECT first_name, last_name
+                        FROM {name}
+                        WHERE {name}.{name}_id = ?
+                    """
+
+    model_data_sql = """
+                        SELECT SUM(positive_events) positive_events
+                            , SUM(negative_events) negative_events
+                        FROM {name}
+                        JOIN employee_events
+                            USING({name}_id)
+                        WHERE {name}.{name}_id = ?
+                    """
+
+
+    # Same result as `model_data_sql`, read from
+    # the per-employee lifetime totals rollup
+    model_data_rollup_sql = """
+                        SELECT SUM(positive_events) positive_events
+                            , SUM(negative_events) negative_events
+                        FROM employee_event_totals
+                        WHERE {name}_id = ?
+                    """
+
+    # Multi-employee version of `model_data_sql`,
+    # one row per employee in the `json_each(?)` list
+    model_data_many_sql = """
+                        SELECT {name}_id
+                            , SUM(positive_events) positive_events
+                            , SUM(negative_events) negative_events
+                        FROM {name}
+                        JOIN employee_events
+                            USING({name}_id)
+                        WHERE {name}.{name}_id IN (SELECT value FROM json_each(?))
+                        GROUP BY {name}_id
+                        ORDER BY {name}_id
+                    """
+
+    model_data_many_rollup_sql = """
+                        SELECT {name}_id
+                            , SUM(positive_events) positive_events
+                            , SUM(negative_events) negative_events
+                        FROM employee_event_totals
+                        WHERE {name}_id IN (SELECT value FROM json_each(?))
+                        GROUP BY {name}_id
+                        ORDER BY {name}_id
+                    """
 
     # Define a method called `names`
     # that receives no arguments
     # This method should return a list of tuples
     # from an sql execution
+    @cached_query
     def names (self):
         
         # Query 3
@@ -26,10 +81,7 @@ class Employee(QueryBase):
         # 2. The employee's id
         # This query should return the data
         # for all employees in the database
-        sql_query = f"""
-                        SELECT first_name || ' ' || last_name AS full_name, employee_id
-                        FROM {self.name}
-                    """
+        sql_query = self.statement(self.names_sql)
 
         return super().query_tupple(sql_query)
 
@@ -37,20 +89,17 @@ class Employee(QueryBase):
     # that receives an `id` argument
     # This method should return a list of tuples
     # from an sql execution
+    @cached_query
     def username(self, id):
         
         # Query 4
         # Write an SQL query
         # that selects an employees full name
-        # Use f-string formatting and a WHERE filter
+        # Use a WHERE filter with a bound parameter
         # to only return the full name of the employee
         # with an id equal to the id argument
-        sql_query = f"""
-                        SELECT first_name, last_name
-                        FROM {self.name}
-                        WHERE {self.name}.{self.name}_id = {id}
-                    """
-        return super(QueryBase, self).query_tupple(sql_query) # tell python to search from beyond QueryBase
+        sql_query = self.statement(self.username_sql)
+        return super(QueryBase, self).query_tupple(sql_query, (id,)) # tell python to search from beyond QueryBase
 
     # Below is method with an SQL query
     # This SQL query generates the data needed for
@@ -60,14 +109,25 @@ class Employee(QueryBase):
     # is returns containing the execution of
     # the sql query
     #### YOUR CODE HERE
+    @cached_query
     def model_data(self, id):
 
-        sql_query =  f"""
-                        SELECT SUM(positive_events) positive_events
-                            , SUM(negative_events) negative_events
-                        FROM {self.name}
-                        JOIN employee_events
-                            USING({self.name}_id)
-                        WHERE {self.name}.{self.name}_id = {id}
-                    """
-        return super().pandas_query(sql_query)
\ No newline at end of file
+        # Read the lifetime totals rollup when it is up to date
+        if rollups_available():
+            sql_query = self.statement(self.model_data_rollup_sql)
+        else:
+            sql_query = self.statement(self.model_data_sql)
+
+        return super().pandas_query(sql_query, (id,))
+
+    # Batched version of `model_data`
+    # Runs a single query for every id in `ids`
+    @cached_query
+    def model_data_many(self, ids):
+
+        if rollups_available():
+            sql_query = self.statement(self.model_data_many_rollup_sql)
+        else:
+            sql_query = self.statement(self.model_data_many_sql)
+
+        return super().pandas_query(sql_query, (self.id_list(ids),))
@@ -0,0 +1,86 @@
+import threading
+from bisect import bisect_left
+
+from .result_cache import data_version
+
+
+class NameIndex:
+    """
+    In-memory prefix index over (name, id) pairs.
+
+    Every name is stored under each of its word-boundary suffixes
+    ("Alex Martinez" under "alex martinez" and "martinez"), in one
+    sorted list. A search bisects to the first key starting with
+    the query, so it costs O(log n + k) however many names there are.
+    """
+
+    def __init__(self, names):
+        self.names = {entity_id: name for name, entity_id in names}
+
+        entries = []
+        for name, entity_id in names:
+            words = name.casefold().split()
+            for start in range(len(words)):
+                entries.append((' '.join(words[start:]), name, entity_id))
+
+        entries.sort(key=lambda entry: (entry[0], entry[1]))
+        self.keys = [key for key, _, _ in entries]
+        self.entries = [(name, entity_id) for _, name, entity_id in entries]
+
+    def __len__(self):
+        return len(self.names)
+
+    def name(self, entity_id):
+        """
+        Returns the name for an id, or None
+        """
+        try:
+            return self.names.get(int(entity_id))
+        except (TypeError, ValueError):
+            return None
+
+    def search(self, query, limit=10):
+        """
+        Returns up to `limit` (name, id) pairs with a word
+        starting with `query` (case-insensitive), sorted by the
+        matched text. An empty query lists the names from the start
+        """
+        query = ' '.join(str(query).casefold().split())
+
+        matches = []
+        seen = set()
+        for position in range(bisect_left(self.keys, query), len(self.keys)):
+            if len(matches) >= limit or not self.keys[position].startswith(query):
+                break
+
+            name, entity_id = self.entries[position]
+            if entity_id not in seen:
+                seen.add(entity_id)
+                matches.append((name, entity_id))
+
+        return matches
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def name_index(model):
+    """
+    Returns the NameIndex of a query class's `names()`. Each index
+    is built once and rebuilt only after the database changes
+    """
+    version = data_version()
+    key = type(model).__name__
+
+    with _indexes_lock:
+        cached = _indexes.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+    index = NameIndex(model.names())
+
+    with _indexes_lock:
+        _indexes[key] = (version, index)
+
+    return index
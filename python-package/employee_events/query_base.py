@@ -1,5 +1,5 @@
 # Import any dependencies needed to execute sql queries
-from employee_events import QueryMixin
+from employee_events import QueryMixin, cached_query, rollups_available, risk_scores_available, run_async, name_index
 
 
 # Define a class called QueryBase
@@ -11,6 +11,108 @@ class QueryBase(QueryMixin):
     # set the attribute to an empty string
     name = ""
 
+    # SQL templates for the queries below
+    # `{name}` is rendered with the `name` class attribute
+    # and `?` placeholders are bound to the method arguments
+    event_counts_sql = """
+                        SELECT SUM(positive_events) AS positive_events
+                            , SUM(negative_events) AS negative_events
+                            , event_date
+                        FROM {name}
+                        JOIN employee_events ON {name}.{name}_id = employee_events.{name}_id
+                        WHERE employee_events.{name}_id = ?
+                        GROUP BY event_date
+                        ORDER BY event_date
+                    """
+
+    # Same result as `event_counts_sql`, read from
+    # the pre-aggregated daily rollup table
+    event_counts_rollup_sql = """
+                        SELECT positive_events, negative_events, event_date
+                        FROM {name}_daily_events
+                        WHERE {name}_id = ?
+                        ORDER BY event_date
+                    """
+
+    # Column dtypes fixed for the event count queries
+    # (dates are parsed once, while fetching)
+    event_counts_dtypes = {
+        'positive_events': 'int64',
+        'negative_events': 'int64',
+        'event_date': 'datetime64[ns]',
+        }
+
+    # Notes are returned newest first, with the note's rowid
+    # breaking ties between notes written on the same day
+    notes_sql = """
+                        SELECT note_date, note
+                        FROM {name}
+                        INNER JOIN notes USING({name}_id)
+                        WHERE {name}_id = ?
+                        ORDER BY note_date DESC, notes.rowid DESC
+                    """
+
+    # Keyset pagination over the same ordering
+    # The first page starts at the newest note and each
+    # following page starts after the (note_date, rowid)
+    # of the last note on the previous page
+    notes_page_sql = """
+                        SELECT note_date, note, notes.rowid AS note_id
+                        FROM {name}
+                        INNER JOIN notes USING({name}_id)
+                        WHERE {name}_id = ?
+                        ORDER BY note_date DESC, notes.rowid DESC
+                        LIMIT ?
+                    """
+
+    notes_after_sql = """
+                        SELECT note_date, note, notes.rowid AS note_id
+                        FROM {name}
+                        INNER JOIN notes USING({name}_id)
+                        WHERE {name}_id = ?
+                            AND (note_date, notes.rowid) < (?, ?)
+                        ORDER BY note_date DESC, notes.rowid DESC
+                        LIMIT ?
+                    """
+
+    # Multi-entity versions of the queries above
+    # Each returns one long-format result for every id
+    # in the `json_each(?)` list, keyed by the `{name}_id` column
+    event_counts_many_sql = """
+                        SELECT employee_events.{name}_id
+                            , SUM(positive_events) AS positive_events
+                            , SUM(negative_events) AS negative_events
+                            , event_date
+                        FROM {name}
+                        JOIN employee_events ON {name}.{name}_id = employee_events.{name}_id
+                        WHERE employee_events.{name}_id IN (SELECT value FROM json_each(?))
+                        GROUP BY employee_events.{name}_id, event_date
+                        ORDER BY employee_events.{name}_id, event_date
+                    """
+
+    event_counts_many_rollup_sql = """
+                        SELECT {name}_id, positive_events, negative_events, event_date
+                        FROM {name}_daily_events
+                        WHERE {name}_id IN (SELECT value FROM json_each(?))
+                        ORDER BY {name}_id, event_date
+                    """
+
+    # Stored risk score, see risk_scores.py
+    risk_score_sql = """
+                        SELECT risk
+                        FROM risk_scores
+                        WHERE entity_type = '{name}'
+                            AND entity_id = ?
+                    """
+
+    notes_many_sql = """
+                        SELECT {name}_id, note_date, note
+                        FROM {name}
+                        INNER JOIN notes USING({name}_id)
+                        WHERE {name}_id IN (SELECT value FROM json_each(?))
+                        ORDER BY {name}_id, note_date DESC, notes.rowid DESC
+                    """
+
     # Define a `names` method that receives
     # no passed arguments
     def names(self):
@@ -18,46 +120,172 @@ class QueryBase(QueryMixin):
         # Return an empty list
         return []
 
+    # Define a `search_names` method that returns up to
+    # `limit` (name, id) tuples with a word starting with `query`
+    # The names are searched in memory, see name_search.py
+    def search_names(self, query, limit=10):
+        return name_index(self).search(query, limit)
+
+    # Define a `display_name` method that returns
+    # the name shown for an id, or None
+    def display_name(self, id):
+        return name_index(self).name(id)
+
 
     # Define an `event_counts` method
     # that receives an `id` argument
     # This method should return a pandas dataframe
+    @cached_query
     def event_counts(self, id):
 
         # QUERY 1
         # Write an SQL query that groups by `event_date`
         # and sums the number of positive and negative events
-        # Use f-string formatting to set the FROM {table}
-        # to the `name` class attribute
-        # Use f-string formatting to set the name
-        # of id columns used for joining
+        # The FROM {table} and the name of the id
+        # columns used for joining are set from
+        # the `name` class attribute
         # order by the event_date column
-        sql_query = f"""
-                        SELECT SUM(positive_events) AS positive_events,  SUM(negative_events) AS negative_events, event_date
-                        FROM {self.name}
-                        JOIN employee_events ON {self.name}.{self.name}_id = employee_events.{self.name}_id 
-                        WHERE employee_events.{self.name}_id = {id}
-                        GROUP BY event_date
-                        ORDER BY event_date
-                    """
-            
-        return super().pandas_query(sql_query)
+        # The entity id is passed as a bound parameter
+        # so the SQL text is the same for every id
+        # Read the daily rollup when it is up to date
+        if rollups_available():
+            sql_query = self.statement(self.event_counts_rollup_sql)
+        else:
+            sql_query = self.statement(self.event_counts_sql)
+
+        return super().pandas_query(sql_query, (id,), self.event_counts_dtypes)
 
     # Define a `notes` method that receives an id argument
     # This function should return a pandas dataframe
-    def notes(self, id):
+    # Pass `limit` (and the `cursor` returned by `notes_page`)
+    # to read the notes one page at a time
+    @cached_query
+    def notes(self, id, limit=None, cursor=None):
+
+        if limit is not None or cursor is not None:
+            return self.notes_page(id, limit, cursor)[0]
 
         # QUERY 2
         # Write an SQL query that returns `note_date`, and `note`
         # from the `notes` table
-        # Set the joined table names and id columns
-        # with f-string formatting
+        # The joined table names and id columns
+        # are set from the `name` class attribute
         # so the query returns the notes
         # for the table name in the `name` class attribute
-        sql_query = f"""
-                        SELECT note_date, note
-                        FROM {self.name}
-                        INNER JOIN notes USING({self.name}_id)
-                        WHERE {self.name}_id = {id}
-                    """       
-        return super().pandas_query(sql_query)
\ No newline at end of file
+        sql_query = self.statement(self.notes_sql)
+
+        return super().pandas_query(sql_query, (id,))
+
+    # Define a `notes_page` method that returns a page of
+    # at most `limit` notes, newest first, starting after `cursor`
+    # This method returns a (dataframe, next cursor) tuple
+    # The next cursor is None when there are no more notes
+    @cached_query
+    def notes_page(self, id, limit=None, cursor=None):
+        return self.fetch_notes_page(id, limit, cursor)
+
+    # Uncached version of `notes_page`, for reads that would
+    # only flush the result cache (e.g. exporting every note)
+    def fetch_notes_page(self, id, limit=None, cursor=None):
+
+        # SQLite treats a negative LIMIT as no limit
+        # One extra row is fetched to tell if another page follows
+        fetch = -1 if limit is None else limit + 1
+
+        if cursor is None:
+            sql_query = self.statement(self.notes_page_sql)
+            params = (id, fetch)
+        else:
+            note_date, note_id = self.parse_notes_cursor(cursor)
+            sql_query = self.statement(self.notes_after_sql)
+            params = (id, note_date, note_id, fetch)
+
+        page = super().pandas_query(sql_query, params)
+
+        next_cursor = None
+        if limit is not None and len(page) > limit:
+            page = page.iloc[:limit]
+            last = page.iloc[-1]
+            next_cursor = f"{last['note_date']}:{last['note_id']}"
+
+        return page.drop(columns='note_id', errors='ignore'), next_cursor
+
+    # Cursors are "<note_date>:<rowid>" strings
+    # so they can be passed around in urls
+    def parse_notes_cursor(self, cursor):
+        note_date, _, note_id = str(cursor).rpartition(':')
+        if not note_date:
+            raise ValueError(f"Invalid notes cursor: {cursor!r}")
+        return note_date, int(note_id)
+
+    # Define a `risk_score` method that returns the stored risk
+    # of an id for the model version `model_version`
+    # (NaN when the entity has no events), or None when the
+    # risk_scores table is not current for that model or has no row
+    @cached_query
+    def risk_score(self, id, model_version):
+
+        if not risk_scores_available(model_version):
+            return None
+
+        rows = self.query_tupple(self.statement(self.risk_score_sql), (id,))
+        if len(rows) == 0:
+            return None
+
+        risk = rows[0][0]
+        return float('nan') if risk is None else risk
+
+    # Batched versions of `event_counts` and `notes`
+    # Each runs a single query for every id in `ids`
+    @cached_query
+    def event_counts_many(self, ids):
+
+        if rollups_available():
+            sql_query = self.statement(self.event_counts_many_rollup_sql)
+        else:
+            sql_query = self.statement(self.event_counts_many_sql)
+
+        return super().pandas_query(sql_query, (self.id_list(ids),), self.event_counts_dtypes)
+
+    @cached_query
+    def notes_many(self, ids):
+
+        sql_query = self.statement(self.notes_many_sql)
+
+        return super().pandas_query(sql_query, (self.id_list(ids),))
+
+    # Non-blocking variants of the query methods for async callers
+    # Each runs the (possibly subclassed) sync method
+    # on the bounded query executor
+    async def anames(self):
+        return await run_async(self.names)
+
+    async def asearch_names(self, query, limit=10):
+        return await run_async(self.search_names, query, limit)
+
+    async def ausername(self, id):
+        return await run_async(self.username, id)
+
+    async def aevent_counts(self, id):
+        return await run_async(self.event_counts, id)
+
+    async def anotes(self, id, limit=None, cursor=None):
+        return await run_async(self.notes, id, limit, cursor)
+
+    async def anotes_page(self, id, limit=None, cursor=None):
+        return await run_async(self.notes_page, id, limit, cursor)
+
+    async def arisk_score(self, id, model_version):
+        return await run_async(self.risk_score, id, model_version)
+
+    async def amodel_data(self, id):
+        return await run_async(self.model_data, id)
+
+    async def aevent_counts_many(self, ids):
+        return await run_async(self.event_counts_many, ids)
+
+    async def anotes_many(self, ids):
+        return await run_async(self.notes_many, ids)
+
+    async def amodel_data_many(self, ids):
+        return await run_async(self.model_data_many, ids)
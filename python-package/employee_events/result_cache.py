@@ -0,0 +1,212 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from . import sql_execution
+from .connection_pool import file_version
+from .sql_execution import db_path, error_count, load_pandas
+
+
+def data_version(path=db_path):
+    """
+    Returns a token that changes whenever the data served
+    from the database at `path` changes.
+
+    That is the file's version (see `file_version`), except while the
+    shared pool serves an in-memory snapshot of the file. Then it is
+    the version the snapshot was taken at, so the caches keep matching
+    what the queries read until `configure()` takes a new snapshot
+    """
+    snapshot = sql_execution.pool.snapshot
+    if snapshot is not None and str(path) == str(sql_execution.pool.db_path):
+        return snapshot
+
+    return file_version(path)
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with an optional time-to-live.
+
+    `max_size` bounds the number of entries. When `sizeof` is given,
+    `max_bytes` additionally bounds the summed `sizeof(value)`.
+    """
+
+    def __init__(self, max_size=1024, ttl=None, max_bytes=None, sizeof=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+
+        self._entries = OrderedDict()   # key -> (value, expires, nbytes)
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,       # dropped to respect max_size/max_bytes
+            'expirations': 0,     # dropped because the ttl passed
+            'invalidations': 0,   # dropped by `invalidate`/`clear`
+            }
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self._stats['misses'] += 1
+                return default
+
+            value, expires, _ = entry
+            if expires is not None and expires < time.monotonic():
+                self._remove(key)
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return value
+
+    def set(self, key, value):
+        nbytes = self.sizeof(value) if self.sizeof else 0
+        expires = time.monotonic() + self.ttl if self.ttl else None
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (value, expires, nbytes)
+            self._bytes += nbytes
+
+            while self._entries and (
+                    len(self._entries) > self.max_size
+                    or (self.max_bytes is not None and self._bytes > self.max_bytes)):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats['evictions'] += 1
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def _remove(self, key):
+        _, _, nbytes = self._entries.pop(key)
+        self._bytes -= nbytes
+
+    def invalidate(self, predicate=None):
+        """
+        Drops every entry whose key matches `predicate`
+        (every entry when no predicate is given)
+        """
+        with self._lock:
+            keys = [key for key in self._entries if predicate is None or predicate(key)]
+            for key in keys:
+                self._remove(key)
+            self._stats['invalidations'] += len(keys)
+            return len(keys)
+
+    def clear(self):
+        return self.invalidate()
+
+    def stats(self):
+        """Returns a snapshot of the cache counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+            stats['bytes'] = self._bytes
+        return stats
+
+
+class ResultCache(LRUCache):
+    """
+    LRU cache of query results that empties itself when the database changes
+    """
+
+    def __init__(self, max_size=1024, ttl=300.0, path=db_path, **kwargs):
+        super().__init__(max_size=max_size, ttl=ttl, **kwargs)
+        self.path = path
+        self._version = data_version(path)
+
+    def check_version(self):
+        """
+        Clears the cache if the database changed since the last check
+        """
+        version = data_version(self.path)
+        if version != self._version:
+            with self._lock:
+                self._version = version
+                self.clear()
+
+    def get(self, key, default=None):
+        self.check_version()
+        return super().get(key, default)
+
+
+# Shared cache for QueryBase results
+# Size and ttl can be tuned with environment variables
+result_cache = ResultCache(
+    max_size=int(os.environ.get('EMPLOYEE_EVENTS_CACHE_SIZE', 1024)),
+    ttl=float(os.environ.get('EMPLOYEE_EVENTS_CACHE_TTL', 300)),
+    )
+
+_missing = object()
+
+
+def _copy(result):
+    # callers are free to modify what they get back
+    # (e.g. `fillna(inplace=True)`), so never hand out the cached object
+    if isinstance(result, load_pandas().DataFrame):
+        return result.copy()
+    if isinstance(result, list):
+        return list(result)
+    if isinstance(result, tuple):
+        return tuple(_copy(item) for item in result)
+    return result
+
+
+def _hashable(arg):
+    # id lists passed to the *_many methods become tuples
+    # (including numpy arrays and pandas Series/Index)
+    if isinstance(arg, (list, set, frozenset)) or getattr(arg, 'ndim', 0) > 0:
+        return tuple(arg)
+    return arg
+
+
+def cached_query(method):
+    """
+    Decorator that caches a query method's result in `result_cache`,
+    keyed on (entity class, method name, arguments). Results of a
+    call that hit a database error (the empty fallback results)
+    are returned but not cached, so the next call retries
+    """
+
+    @wraps(method)
+    def run_cached(self, *args, **kwargs):
+        key = (
+            type(self).__name__,
+            method.__name__,
+            tuple(_hashable(arg) for arg in args),
+            tuple(sorted((k, _hashable(v)) for k, v in kwargs.items())),
+            )
+
+        result = result_cache.get(key, _missing)
+        if result is _missing:
+            errors = error_count()
+            result = method(self, *args, **kwargs)
+            if error_count() == errors:
+                result_cache.set(key, _copy(result))
+
+        return _copy(result)
+
+    return run_cached
+
+
+def cache_stats():
+    """
+    Returns the result cache counters
+    (hits, misses, evictions, expirations, invalidations, size)
+    """
+    return result_cache.stats()
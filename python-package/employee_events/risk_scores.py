@@ -0,0 +1,168 @@
+"""
+Precomputed recruitment risk scores
+
+    risk_scores    one row per (entity_type, entity_id): the risk
+                   predicted for the employee or team, the version of
+                   the model that predicted it and the employee_events
+                   rowid watermark it was computed at
+
+Employees are scored on their lifetime event totals and teams get the
+mean risk of their members, the same as the dashboard's live scoring.
+The model lives with the dashboard, so `refresh_risk_scores` is given
+its `predict` function and version. See report/risk_scoring.py.
+
+A refresh only re-scores the employees and teams with employee_events
+rows appended since the last one. A refresh with a new model version
+re-scores everything. As with the rollups, rows updated or deleted in
+place are not picked up, refresh with `rebuild=True` after such changes.
+
+`QueryBase.risk_score` reads a stored score while the table is current
+for the given model version and returns None otherwise.
+"""
+import sqlite3
+import threading
+
+from . import sql_execution
+from .sql_execution import db_path, load_pandas
+from .result_cache import data_version
+
+
+CREATE_STATEMENT = '''CREATE TABLE IF NOT EXISTS risk_scores (
+        entity_type TEXT NOT NULL,
+        entity_id INTEGER NOT NULL,
+        risk REAL,
+        model_version TEXT NOT NULL,
+        watermark INTEGER NOT NULL,
+        PRIMARY KEY (entity_type, entity_id)
+    ) WITHOUT ROWID'''
+
+UPSERT_STATEMENT = '''INSERT INTO risk_scores (entity_type, entity_id, risk, model_version, watermark)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (entity_type, entity_id) DO UPDATE SET
+        risk = excluded.risk,
+        model_version = excluded.model_version,
+        watermark = excluded.watermark'''
+
+# Watermark of the last refresh with model version ?
+# NULL when nothing was scored yet or another model scored some rows
+LAST_WATERMARK_SQL = '''
+    SELECT CASE
+        WHEN EXISTS (SELECT 1 FROM risk_scores WHERE model_version != ?) THEN NULL
+        ELSE (SELECT MAX(watermark) FROM risk_scores)
+    END
+    '''
+
+# True when every stored score comes from model version ?
+# and has seen every employee_events row
+CURRENT_SQL = '''
+    SELECT NOT EXISTS (SELECT 1 FROM risk_scores WHERE model_version != ?)
+        AND (SELECT MAX(watermark) FROM risk_scores)
+            >= (SELECT IFNULL(MAX(rowid), 0) FROM employee_events)
+    '''
+
+# Ids of every entity, and of those with events after rowid ?
+ALL_IDS_SQL = 'SELECT {name}_id FROM {name} ORDER BY {name}_id'
+CHANGED_IDS_SQL = 'SELECT DISTINCT {name}_id FROM employee_events WHERE rowid > ? ORDER BY {name}_id'
+
+
+def score_entities(conn, query, ids, predict):
+    """
+    Returns the risk of every id in `ids` as a Series indexed by id
+    (NaN for ids without events), read from the raw event tables
+    """
+    pd = load_pandas()
+
+    data = pd.read_sql_query(
+        query.statement(query.model_data_many_sql), conn, params=(query.id_list(ids),),
+        )
+
+    if data.empty:
+        return pd.Series(float('nan'), index=ids, dtype='float64')
+
+    risk = pd.Series(predict(data), index=data.index)
+
+    return risk.groupby(data[f'{query.name}_id']).mean().reindex(ids)
+
+
+def refresh_risk_scores(predict, model_version, path=db_path, rebuild=False):
+    """
+    Creates the risk_scores table if needed and re-scores every
+    employee and team whose events changed since the last refresh
+    (every one of them on a rebuild or a new `model_version`).
+    `predict` returns the risk for each row of a model_data frame.
+    Returns the number of entities scored
+    """
+    pd = load_pandas()
+
+    # imported here, the query classes import this module
+    from .employee import Employee
+    from .team import Team
+
+    conn = sqlite3.connect(path, isolation_level=None)
+    scored = 0
+    try:
+        conn.execute(CREATE_STATEMENT)
+
+        # take the write lock before reading the watermark so the
+        # features and the watermark come from the same snapshot
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            max_rowid = conn.execute('SELECT IFNULL(MAX(rowid), 0) FROM employee_events').fetchone()[0]
+            last_rowid = None if rebuild else conn.execute(LAST_WATERMARK_SQL, (model_version,)).fetchone()[0]
+
+            for query_class in (Employee, Team):
+                query = query_class()
+
+                if last_rowid is None:
+                    rows = conn.execute(query.statement(ALL_IDS_SQL)).fetchall()
+                else:
+                    rows = conn.execute(query.statement(CHANGED_IDS_SQL), (last_rowid,)).fetchall()
+
+                ids = [entity_id for entity_id, in rows]
+                if not ids:
+                    continue
+
+                risk = score_entities(conn, query, ids, predict)
+                conn.executemany(UPSERT_STATEMENT, [
+                    (query.name, entity_id, None if pd.isna(value) else float(value), model_version, max_rowid)
+                    for entity_id, value in risk.items()
+                    ])
+                scored += len(ids)
+
+            conn.execute('COMMIT')
+
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    finally:
+        conn.close()
+
+    return scored
+
+
+_current = {}
+_current_lock = threading.Lock()
+
+
+def risk_scores_available(model_version):
+    """
+    Returns True when the stored scores are current for `model_version`.
+    The answer is re-checked only when the database file changes
+    """
+    version = data_version()
+
+    with _current_lock:
+        if _current.get(model_version, (None,))[0] == version:
+            return _current[model_version][1]
+
+    try:
+        with sql_execution.pool.connection() as conn:
+            current = bool(conn.execute(CURRENT_SQL, (model_version,)).fetchone()[0])
+    except sqlite3.Error:
+        current = False
+
+    with _current_lock:
+        _current[model_version] = (version, current)
+
+    return current
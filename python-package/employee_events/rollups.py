@@ -0,0 +1,195 @@
+"""
+Materialized rollups of the employee_events table
+
+    employee_daily_events    events summed per (employee_id, event_date)
+    team_daily_events        events summed per (team_id, event_date)
+    employee_event_totals    lifetime events summed per (employee_id, team_id)
+
+`refresh_rollups()` only aggregates the employee_events rows appended
+since the last refresh (tracked by rowid in `rollup_state`) and adds them
+onto the existing rollup rows. Rows that are updated or deleted in place
+are not picked up, use `rebuild_rollups()` after such changes.
+
+The query classes read from the rollups while they are up to date
+with employee_events and fall back to the raw table otherwise.
+
+Usage:
+    python -m employee_events.rollups [--rebuild] [db_path]
+"""
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+from . import sql_execution
+from .sql_execution import db_path
+from .result_cache import data_version
+
+
+ROLLUP_TABLES = ['employee_daily_events', 'team_daily_events', 'employee_event_totals']
+
+CREATE_STATEMENTS = [
+    '''CREATE TABLE IF NOT EXISTS employee_daily_events (
+            employee_id INTEGER NOT NULL,
+            event_date TEXT NOT NULL,
+            positive_events INTEGER NOT NULL,
+            negative_events INTEGER NOT NULL,
+            PRIMARY KEY (employee_id, event_date)
+        ) WITHOUT ROWID''',
+    '''CREATE TABLE IF NOT EXISTS team_daily_events (
+            team_id INTEGER NOT NULL,
+            event_date TEXT NOT NULL,
+            positive_events INTEGER NOT NULL,
+            negative_events INTEGER NOT NULL,
+            PRIMARY KEY (team_id, event_date)
+        ) WITHOUT ROWID''',
+    '''CREATE TABLE IF NOT EXISTS employee_event_totals (
+            employee_id INTEGER NOT NULL,
+            team_id INTEGER NOT NULL,
+            positive_events INTEGER NOT NULL,
+            negative_events INTEGER NOT NULL,
+            PRIMARY KEY (employee_id, team_id)
+        ) WITHOUT ROWID''',
+    '''CREATE INDEX IF NOT EXISTS ix_employee_event_totals_team
+            ON employee_event_totals (team_id, employee_id, positive_events, negative_events)''',
+    '''CREATE TABLE IF NOT EXISTS rollup_state (
+            name TEXT PRIMARY KEY,
+            last_rowid INTEGER NOT NULL
+        )''',
+    ]
+
+# Each statement aggregates the rows in the rowid range (?, ?]
+# and adds them onto the existing rollup rows
+REFRESH_STATEMENTS = [
+    '''INSERT INTO employee_daily_events (employee_id, event_date, positive_events, negative_events)
+        SELECT employee_id, event_date, SUM(positive_events), SUM(negative_events)
+        FROM employee_events
+        WHERE rowid > ? AND rowid <= ?
+        GROUP BY employee_id, event_date
+        ON CONFLICT (employee_id, event_date) DO UPDATE SET
+            positive_events = positive_events + excluded.positive_events,
+            negative_events = negative_events + excluded.negative_events''',
+    '''INSERT INTO team_daily_events (team_id, event_date, positive_events, negative_events)
+        SELECT team_id, event_date, SUM(positive_events), SUM(negative_events)
+        FROM employee_events
+        WHERE rowid > ? AND rowid <= ?
+        GROUP BY team_id, event_date
+        ON CONFLICT (team_id, event_date) DO UPDATE SET
+            positive_events = positive_events + excluded.positive_events,
+            negative_events = negative_events + excluded.negative_events''',
+    '''INSERT INTO employee_event_totals (employee_id, team_id, positive_events, negative_events)
+        SELECT employee_id, team_id, SUM(positive_events), SUM(negative_events)
+        FROM employee_events
+        WHERE rowid > ? AND rowid <= ?
+        GROUP BY employee_id, team_id
+        ON CONFLICT (employee_id, team_id) DO UPDATE SET
+            positive_events = positive_events + excluded.positive_events,
+            negative_events = negative_events + excluded.negative_events''',
+    ]
+
+# True when every rollup table exists and has seen every employee_events row
+CURRENT_SQL = f'''
+    SELECT
+        (SELECT COUNT(*) FROM sqlite_master
+            WHERE type = 'table' AND name IN ({", ".join(f"'{t}'" for t in ROLLUP_TABLES)})) = {len(ROLLUP_TABLES)}
+        AND (SELECT last_rowid FROM rollup_state WHERE name = 'employee_events')
+            >= (SELECT IFNULL(MAX(rowid), 0) FROM employee_events)
+    '''
+
+
+def refresh_rollups(path=db_path):
+    """
+    Creates the rollup tables if needed and adds every employee_events
+    row appended since the last refresh. Returns the number of new rows
+    """
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        for statement in CREATE_STATEMENTS:
+            conn.execute(statement)
+
+        # take the write lock before reading the watermark
+        # so concurrent refreshes cannot add the same rows twice
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                "SELECT last_rowid FROM rollup_state WHERE name = 'employee_events'"
+                ).fetchone()
+            last_rowid = row[0] if row else 0
+            max_rowid = conn.execute('SELECT IFNULL(MAX(rowid), 0) FROM employee_events').fetchone()[0]
+
+            if max_rowid > last_rowid:
+                for statement in REFRESH_STATEMENTS:
+                    conn.execute(statement, (last_rowid, max_rowid))
+
+            conn.execute(
+                '''INSERT INTO rollup_state (name, last_rowid) VALUES ('employee_events', ?)
+                    ON CONFLICT (name) DO UPDATE SET last_rowid = excluded.last_rowid''',
+                (max_rowid,))
+            conn.execute('COMMIT')
+
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    finally:
+        conn.close()
+
+    return max(max_rowid - last_rowid, 0)
+
+
+def rebuild_rollups(path=db_path):
+    """
+    Drops and recomputes every rollup table from employee_events
+    """
+    conn = sqlite3.connect(path)
+    try:
+        with conn:
+            for table in [*ROLLUP_TABLES, 'rollup_state']:
+                conn.execute(f'DROP TABLE IF EXISTS {table}')
+    finally:
+        conn.close()
+
+    return refresh_rollups(path)
+
+
+_current = {'version': None, 'current': False}
+_current_lock = threading.Lock()
+
+
+def rollups_available():
+    """
+    Returns True when the query classes can read from the rollup tables.
+    The answer is re-checked only when the database file changes
+    """
+    version = data_version()
+
+    with _current_lock:
+        if _current['version'] == version:
+            return _current['current']
+
+    try:
+        with sql_execution.pool.connection() as conn:
+            current = bool(conn.execute(CURRENT_SQL).fetchone()[0])
+    except sqlite3.Error:
+        current = False
+
+    with _current_lock:
+        _current['version'] = version
+        _current['current'] = current
+
+    return current
+
+
+def main(argv):
+
+    rebuild = '--rebuild' in argv
+    args = [arg for arg in argv if arg != '--rebuild']
+    path = Path(args[0]) if args else db_path
+
+    rows = rebuild_rollups(path) if rebuild else refresh_rollups(path)
+    print(f"Rolled up {rows} employee_events row(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,179 @@
+"""
+Schema and index management for employee_events.db
+
+The tables are written by `DataFrame.to_sql`, which creates no keys
+and no indexes. The migrations below add them to an existing database.
+Each migration runs once and is recorded in `PRAGMA user_version`,
+and every statement is idempotent, so `migrate()` is safe to re-run.
+
+Usage:
+    python -m employee_events.schema [db_path]            apply migrations
+    python -m employee_events.schema --check [db_path]    check query plans
+"""
+import sqlite3
+import sys
+from pathlib import Path
+
+from .sql_execution import db_path
+from .employee import Employee
+from .team import Team
+
+
+# Ordered list of (version, statements)
+# Append new migrations to the end, never edit applied ones
+MIGRATIONS = [
+    (1, [
+        # keys for the entity tables
+        'CREATE UNIQUE INDEX IF NOT EXISTS pk_employee ON employee (employee_id)',
+        'CREATE UNIQUE INDEX IF NOT EXISTS pk_team ON team (team_id)',
+
+        # covering indexes for the per-entity event queries
+        '''CREATE INDEX IF NOT EXISTS ix_employee_events_employee_date
+            ON employee_events (employee_id, event_date, positive_events, negative_events)''',
+        '''CREATE INDEX IF NOT EXISTS ix_employee_events_team_date
+            ON employee_events (team_id, event_date, positive_events, negative_events)''',
+        '''CREATE INDEX IF NOT EXISTS ix_employee_events_team_employee
+            ON employee_events (team_id, employee_id, positive_events, negative_events)''',
+
+        # covering indexes for the per-entity notes queries
+        'CREATE INDEX IF NOT EXISTS ix_notes_employee_date ON notes (employee_id, note_date, note)',
+        'CREATE INDEX IF NOT EXISTS ix_notes_team_date ON notes (team_id, note_date, note)',
+
+        'ANALYZE',
+        ]),
+    (2, [
+        # notes are paged by (note_date, rowid). An index that ends
+        # at note_date keeps the implicit rowid right after it, so
+        # the page order comes straight from the index with no sort
+        'DROP INDEX IF EXISTS ix_notes_employee_date',
+        'DROP INDEX IF EXISTS ix_notes_team_date',
+        'CREATE INDEX IF NOT EXISTS ix_notes_employee_page ON notes (employee_id, note_date)',
+        'CREATE INDEX IF NOT EXISTS ix_notes_team_page ON notes (team_id, note_date)',
+        'ANALYZE',
+        ]),
+    ]
+
+# Queries that are expected to read every row of their table
+# (the dropdown lists every employee or team)
+FULL_SCAN_QUERIES = {'names_sql'}
+
+# Queries of tables built by a refresh rather than a migration
+# (see rollups.py and risk_scores.py), skipped until they exist
+REFRESHED_TABLE_QUERIES = {'risk_score_sql'}
+
+# Query classes checked by `check_query_plans`
+QUERY_CLASSES = [Employee, Team]
+
+
+def schema_version(path=db_path):
+    """
+    Returns the last migration version applied to the database
+    """
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute('PRAGMA user_version').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def migrate(path=db_path):
+    """
+    Applies every migration newer than the database's `user_version`.
+    Returns the list of versions applied
+    """
+    applied = []
+
+    conn = sqlite3.connect(path)
+    try:
+        current = conn.execute('PRAGMA user_version').fetchone()[0]
+
+        for version, statements in MIGRATIONS:
+            if version <= current:
+                continue
+
+            with conn:
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute(f'PRAGMA user_version = {version}')
+
+            applied.append(version)
+    finally:
+        conn.close()
+
+    return applied
+
+
+def query_templates(query_class):
+    """
+    Yields (attribute name, rendered sql) for each SQL template on a query class
+    """
+    instance = query_class()
+    for attr in sorted(dir(query_class)):
+        if attr.endswith('_sql'):
+            yield attr, instance.statement(getattr(query_class, attr))
+
+
+def check_query_plans(path=db_path):
+    """
+    Runs `EXPLAIN QUERY PLAN` for every QueryBase query template and
+    returns a list of (class name, query, plan detail) for each query
+    that scans a whole table. An empty list means every query is indexed
+    """
+    problems = []
+
+    uri = f"{Path(path).resolve().as_uri()}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True)
+    try:
+        for query_class in QUERY_CLASSES:
+            for attr, sql in query_templates(query_class):
+                if attr in FULL_SCAN_QUERIES:
+                    continue
+
+                params = (1,) * sql.count('?')
+                try:
+                    plan = conn.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall()
+                except sqlite3.OperationalError:
+                    # rollup and risk score queries are only
+                    # used once their tables are built
+                    if attr.endswith('_rollup_sql') or attr in REFRESHED_TABLE_QUERIES:
+                        continue
+                    raise
+
+                for _id, _parent, _notused, detail in plan:
+                    # scanning a subquery's own result or the
+                    # json_each id list is not a table scan
+                    if (detail.startswith('SCAN ')
+                            and not detail.startswith('SCAN (subquery')
+                            and 'VIRTUAL TABLE' not in detail):
+                        problems.append((query_class.__name__, attr, detail))
+    finally:
+        conn.close()
+
+    return problems
+
+
+def main(argv):
+
+    check = '--check' in argv
+    args = [arg for arg in argv if arg != '--check']
+    path = Path(args[0]) if args else db_path
+
+    if not check:
+        applied = migrate(path)
+        print(f"Applied migrations: {applied or 'none'} (schema version {schema_version(path)})")
+        return 0
+
+    problems = check_query_plans(path)
+    for class_name, attr, detail in problems:
+        print(f"{class_name}.{attr}: {detail}")
+
+    if problems:
+        print(f"{len(problems)} full table scan(s) found")
+        return 1
+
+    print("All queries use an index")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
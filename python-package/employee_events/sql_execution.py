@@ -1,77 +1,265 @@
-from sqlite3 import connect
+import asyncio
+import atexit
+import json
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from functools import wraps
-import pandas as pd
+from functools import partial, wraps
+from typing import TYPE_CHECKING
+
+from .connection_pool import ConnectionPool
+from .statement_cache import StatementCache
+
+# numpy and pandas are imported by the functions that use them,
+# so importing the package (e.g. for the rollup and schema
+# command line tools) does not pay for them
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def load_pandas():
+    """
+    Returns the pandas module, importing it on first use
+    """
+    import pandas
+
+    return pandas
 
 # Using pathlib, create a `db_path` variable
 # that points to the absolute path for the `employee_events.db` file
 cwd = Path(__file__).parent
 db_path = cwd / 'employee_events.db'
 
+# Shared pool of read-only connections used by every query.
+# Connections stay open between queries and are closed
+# by `shutdown()` (registered to run at interpreter exit)
+# The serving mode ('disk', 'mmap' or 'memory', see connection_pool.py)
+# is read from the EMPLOYEE_EVENTS_SERVING_MODE environment variable
+pool = ConnectionPool(db_path, mode=os.environ.get('EMPLOYEE_EVENTS_SERVING_MODE', 'disk'))
+
+# Rendered SQL text for each (query template, table name).
+# Reusing the same text lets the pooled connections reuse
+# their compiled statements
+statements = StatementCache()
+
+# Bounded thread pool used by the async query methods.
+# It is sized to the connection pool so awaiting callers
+# queue here instead of blocking on a free connection
+executor = ThreadPoolExecutor(max_workers=pool.max_size, thread_name_prefix='employee_events')
+
+
+# Number of database errors each thread has swallowed into an
+# empty result. `cached_query` compares it before and after a query
+# so it never caches a result produced by the error path
+_errors = threading.local()
+
+
+def error_count() -> int:
+    """
+    Returns the number of query errors seen on the current thread
+    """
+    return getattr(_errors, 'count', 0)
+
+
+def _count_error():
+    _errors.count = error_count() + 1
+
+
+async def run_async(func, *args, **kwargs):
+    """
+    Runs a blocking function on the query executor
+    without blocking the running event loop
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(func, *args, **kwargs))
+
+
+def configure(mode=None, max_size=None):
+    """
+    Replaces the connection pool, e.g. to switch serving mode.
+    Re-running it in 'memory' mode takes a new snapshot of the
+    database file, and the caches keyed on `data_version` move to it
+    """
+    global pool
+
+    old_pool = pool
+    pool = ConnectionPool(
+        db_path,
+        max_size=max_size or old_pool.max_size,
+        mode=mode or old_pool.mode,
+        )
+    old_pool.close()
+
+    return pool
+
+
+def shutdown():
+    """
+    Closes every pooled database connection
+    and stops the async query executor
+    """
+    executor.shutdown(wait=False, cancel_futures=True)
+    pool.close()
+
+
+def pool_stats():
+    """
+    Returns the connection pool counters
+    (hits, opens, waits, wait_time, size, idle)
+    """
+    return pool.stats()
+
+
+def statement_stats():
+    """
+    Returns the statement cache counters (hits, misses, size)
+    """
+    return statements.stats()
+
+
+atexit.register(shutdown)
+
+
+def fetch_columns(cursor, dtypes=None) -> dict:
+    """
+    Fetches every row from an executed cursor and returns
+    a dict of column name -> NumPy array.
+
+    Columns listed in `dtypes` are converted straight to that dtype
+    (e.g. ISO date strings to `datetime64[ns]`). Other columns get
+    NumPy's inferred dtype, with text and mixed/NULL columns kept as objects
+    """
+    import numpy as np
+
+    dtypes = dtypes or {}
+    names = [description[0] for description in cursor.description]
+
+    rows = cursor.fetchall()
+
+    # transpose the row tuples into one list per column
+    values = [[row[i] for row in rows] for i in range(len(names))]
+
+    columns = {}
+    for name, column in zip(names, values):
+        dtype = dtypes.get(name)
+
+        if dtype is not None:
+            array = np.array(column, dtype=dtype)
+        elif not column:
+            array = np.array(column, dtype=object)
+        else:
+            array = np.array(column)
+            if array.dtype.kind in 'USO':
+                array = np.array(column, dtype=object)
+
+        columns[name] = array
+
+    return columns
+
 
 # OPTION 1: MIXIN
 # Define a class called `QueryMixin`
 class QueryMixin:
 
+    # Render a query template for this class's `name`
+    # Values are never formatted into the SQL text,
+    # they are passed separately as bound parameters
+    def statement(self, template:str) -> str:
+        """
+        Returns the SQL for `template` with `{name}` set to the class's table name
+        """
+        return statements.get(template, self.name)
+
+    # Multi-entity queries bind their whole id list as one
+    # JSON array and read it back with `json_each(?)`,
+    # so the SQL text doesn't change with the number of ids
+    def id_list(self, ids) -> str:
+        """
+        Returns `ids` as a JSON array for a `json_each(?)` parameter
+        """
+        # numpy/pandas integers are converted to plain python values
+        return json.dumps([id.item() if hasattr(id, 'item') else id for id in ids])
+
+
+    # Columnar fetch path used by `pandas_query`
+    # Rows are transposed straight into typed NumPy arrays
+    # instead of going through `pd.read_sql_query`
+    def columnar_query(self, sql_query:str, params=(), dtypes=None) -> dict:
+
+        """
+        Excutes a SQL query and returns the result as a dict of column name -> NumPy array
+        `params` are bound to the query's `?` placeholders
+        `dtypes` fixes the dtype of the named columns
+        A column that cannot be converted to its dtype raises
+        """
+
+        try:
+            # borrow a pooled db connection
+            with pool.connection() as db_conn:
+
+                cursor = db_conn.execute(sql_query, params)
+                columns = fetch_columns(cursor, dtypes)
+
+            return columns
+
+        # only database errors are caught, a dtype conversion error
+        # is a bug in the query or its dtypes and is raised
+        except sqlite3.Error as e:
+
+            # catch and show any errors that occure in the DB interaction
+            print(f"An error with the database interaction occurred: {e}")
+            _count_error()
+
+            return {}   # return no columns on failure
+
 
     # Define a method named `pandas_query`
     # that receives an sql query as a string
     # and returns the query's result
     # as a pandas dataframe
-    def pandas_query(self, sql_query:str) -> pd.DataFrame:
+    def pandas_query(self, sql_query:str, params=(), dtypes=None) -> 'pd.DataFrame':
 
         """
         Excutes a SQL query and returns the result as a padas dataframe
-        
+        `params` are bound to the query's `?` placeholders
+        `dtypes` fixes the dtype of the named columns
         """
 
-        try:
-            # establish db connection
-            db_conn = connect(db_path)
-
-            # query database and return result as dataframe
-            sql_result = pd.read_sql_query(sql_query, db_conn)
-            
-            # close database connection
-            db_conn.close()
+        # an empty dataframe is returned on failure
+        return load_pandas().DataFrame(self.columnar_query(sql_query, params, dtypes))
         
-            return sql_result # return pandas dataframe with query result data
 
-        except Exception as e:
-            
-            # catch and show any errors that occure in the DB interaction
-            print(f"An error with the database interaction occurred: {e}")
-
-            return pd.DataFrame()   # return empty dataframe on failure
-        
+    # Non-blocking variant of `pandas_query` for async callers
+    async def apandas_query(self, sql_query:str, params=(), dtypes=None) -> 'pd.DataFrame':
+        return await run_async(self.pandas_query, sql_query, params, dtypes)
 
         # Define a method named `query_tupple` (using 'query_tupple' to avoid the clash with the decorator method of the same anme below that we cannot change!)
         # that receives an sql_query as a string
         # and returns the query's result as
         # a list of tuples. (You will need
         # to use an sqlite3 cursor)
-    def query_tupple(self, sql_query:str):
+    def query_tupple(self, sql_query:str, params=()):
 
         """
         Excutes and SQL query and returns the result as a list of tuples
+        `params` are bound to the query's `?` placeholders
 
         """
         
         try:
-            # establish db connection
-            db_conn = connect(db_path)
-
-            # create cursor object to run the query
-            cursor = db_conn.cursor()
+            # borrow a pooled db connection
+            with pool.connection() as db_conn:
 
-            # execute the query
-            cursor.execute(sql_query)
+                # create cursor object to run the query
+                cursor = db_conn.cursor()
 
-            # fetch all the results as a list of tuples
-            result = cursor.fetchall()
+                # execute the query
+                cursor.execute(sql_query, params)
 
-            # close db connection
-            db_conn.close()
+                # fetch all the results as a list of tuples
+                result = cursor.fetchall()
 
             return result
 
@@ -79,24 +267,34 @@ class QueryMixin:
 
                 # catch and show any errors that occure in the DB interaction
                 print(f"An error with the database interaction occurred: {e}")
+                _count_error()
 
-                return pd.DataFrame()   # return empty dataframe on failure
+                return load_pandas().DataFrame()   # return empty dataframe on failure
 
     
+    # Non-blocking variant of `query_tupple` for async callers
+    async def aquery_tupple(self, sql_query:str, params=()):
+        return await run_async(self.query_tupple, sql_query, params)
+
     # Leave this code unchanged
     def query(func):
         """
         Decorator that runs a standard sql execution
         and returns a list of tuples
+
+        The decorated function returns either the sql string
+        or a `(sql, params)` tuple of the sql and its bound parameters
         """
 
         @wraps(func)
         def run_query(*args, **kwargs):
             query_string = func(*args, **kwargs)
-            connection = connect(db_path)
-            cursor = connection.cursor()
-            result = cursor.execute(query_string).fetchall()
-            connection.close()
+            params = ()
+            if isinstance(query_string, tuple):
+                query_string, params = query_string
+            with pool.connection() as connection:
+                cursor = connection.cursor()
+                result = cursor.execute(query_string, params).fetchall()
             return result
         
         return run_query
@@ -0,0 +1,58 @@
+import threading
+from collections import OrderedDict
+
+
+class StatementCache:
+    """
+    LRU cache of rendered SQL statements keyed by (query template, table name).
+
+    Query templates are written with a `{name}` placeholder for the
+    entity table and `?` placeholders for values. Rendering a template
+    once per entity class means every call for that class sends the
+    exact same SQL text, so each pooled sqlite3 connection can reuse
+    its compiled statement (sqlite3 keeps a per-connection cache of
+    prepared statements keyed by SQL text, sized by `cached_statements`).
+    """
+
+    def __init__(self, max_size=128):
+        self.max_size = max_size
+        self._statements = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0}
+
+    def get(self, template, name):
+        """Returns `template` rendered for the `name` table"""
+
+        key = (template, name)
+
+        with self._lock:
+            statement = self._statements.get(key)
+
+            if statement is not None:
+                self._statements.move_to_end(key)
+                self._stats['hits'] += 1
+                return statement
+
+            self._stats['misses'] += 1
+
+        statement = template.format(name=name)
+
+        with self._lock:
+            self._statements[key] = statement
+            if len(self._statements) > self.max_size:
+                self._statements.popitem(last=False)
+
+        return statement
+
+    def stats(self):
+        """Returns a snapshot of the cache counters"""
+
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._statements)
+
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._statements.clear()
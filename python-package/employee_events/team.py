@@ -1,5 +1,5 @@
 # Import the QueryBase class
-from employee_events import QueryBase
+from employee_events import QueryBase, cached_query, rollups_available
 
 
 # Import dependencies for sql execution
@@ -13,11 +13,68 @@ class Team(QueryBase):
     # to the string "team"
     name = 'team'
 
+    # SQL templates rendered with the `name` class attribute
+    names_sql = """
+                        SELECT team_name, team_id
+                        FROM {name}
+                    """
+
+    username_sql = """
+                        SELECT team_name
+                        FROM {name}
+                        WHERE {name}.{name}_id = ?
+                    """
+
+    model_data_sql = """
+                        SELECT positive_events, negative_events FROM (
+                                SELECT employee_id
+                                    , SUM(positive_events) positive_events
+                                    , SUM(negative_events) negative_events
+                                FROM {name}
+                                JOIN employee_events
+                                    USING({name}_id)
+                                WHERE {name}.{name}_id = ?
+                                GROUP BY employee_id
+                            )
+                    """
+
+
+    # Same result as `model_data_sql`, read from
+    # the per-employee lifetime totals rollup
+    model_data_rollup_sql = """
+                        SELECT positive_events, negative_events
+                        FROM employee_event_totals
+                        WHERE {name}_id = ?
+                        ORDER BY employee_id
+                    """
+
+    # Multi-team version of `model_data_sql`, one row
+    # per (team, employee) for the teams in the `json_each(?)` list
+    model_data_many_sql = """
+                        SELECT {name}_id
+                            , employee_id
+                            , SUM(positive_events) positive_events
+                            , SUM(negative_events) negative_events
+                        FROM {name}
+                        JOIN employee_events
+                            USING({name}_id)
+                        WHERE {name}.{name}_id IN (SELECT value FROM json_each(?))
+                        GROUP BY {name}_id, employee_id
+                        ORDER BY {name}_id, employee_id
+                    """
+
+    model_data_many_rollup_sql = """
+                        SELECT {name}_id, employee_id, positive_events, negative_events
+                        FROM employee_event_totals
+                        WHERE {name}_id IN (SELECT value FROM json_each(?))
+                        ORDER BY {name}_id, employee_id
+                    """
 
     # Define a `names` method
     # that receives no arguments
     # This method should return
     # a list of tuples from an sql execution
+    @cached_query
     def names(self):
         
         # Query 5
@@ -25,30 +82,26 @@ class Team(QueryBase):
         # the team_name and team_id columns
         # from the team table for all teams
         # in the database
-        sql_query = f"""
-                        SELECT team_name, team_id
-                        FROM {self.name}
-                    """
+        sql_query = self.statement(self.names_sql)
+
         return super().query_tupple(sql_query)
 
     # Define a `username` method
     # that receives an ID argument
     # This method should return
     # a list of tuples from an sql execution
+    @cached_query
     def username(self, id):
 
         # Query 6
         # Write an SQL query
         # that selects the team_name column
-        # Use f-string formatting and a WHERE filter
+        # Use a WHERE filter with a bound parameter
         # to only return the team name related to
         # the ID argument
-        sql_query = f"""
-                        SELECT team_name
-                        FROM {self.name}
-                        WHERE {self.name}.{self.name}_id = {id}
-                    """
-        return super().query_tupple(sql_query)
+        sql_query = self.statement(self.username_sql)
+
+        return super().query_tupple(sql_query, (id,))
 
     # Below is method with an SQL query
     # This SQL query generates the data needed for
@@ -58,18 +111,25 @@ class Team(QueryBase):
     # is returns containing the execution of
     # the sql query
     #### YOUR CODE HERE
+    @cached_query
     def model_data(self, id):
 
-        sql_query = f"""
-                        SELECT positive_events, negative_events FROM (
-                                SELECT employee_id
-                                    , SUM(positive_events) positive_events
-                                    , SUM(negative_events) negative_events
-                                FROM {self.name}
-                                JOIN employee_events
-                                    USING({self.name}_id)
-                                WHERE {self.name}.{self.name}_id = {id}
-                                GROUP BY employee_id
-                            )
-                    """
-        return super().pandas_query(sql_query)
\ No newline at end of file
+        # Read the lifetime totals rollup when it is up to date
+        if rollups_available():
+            sql_query = self.statement(self.model_data_rollup_sql)
+        else:
+            sql_query = self.statement(self.model_data_sql)
+
+        return super().pandas_query(sql_query, (id,))
+
+    # Batched version of `model_data`
+    # Runs a single query for every id in `ids`
+    @cached_query
+    def model_data_many(self, ids):
+
+        if rollups_available():
+            sql_query = self.statement(self.model_data_many_rollup_sql)
+        else:
+            sql_query = self.statement(self.model_data_many_sql)
+
+        return super().pandas_query(sql_query, (self.id_list(ids),))
@@ -2,4 +2,8 @@ from .base_component import BaseComponent
 from .dropdown import Dropdown
 from .radio import Radio
 from .matplotlib_viz import MatplotlibViz
-from .data_table import DataTable
\ No newline at end of file
+from .data_table import DataTable
+from . import process_renderer
+from . import chart_renderers
+from .lazy_section import LazySection
+from .typeahead import TypeaheadDropdown
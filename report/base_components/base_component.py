@@ -1,5 +1,14 @@
+from employee_events import run_async
+from .fragment_cache import fragment_cache
+
+
 class BaseComponent:
 
+    # Set to True to memoize the component's HTML in `fragment_cache`
+    # Only for components whose output depends on nothing but
+    # (entity_id, model name, database contents)
+    cacheable = False
+
     def build_component(self, entity_id, model):
         raise NotImplementedError
     
@@ -12,6 +21,20 @@ class BaseComponent:
 
     def __call__(self, entity_id, model):
 
+        if self.cacheable:
+            cached = fragment_cache.get(self, entity_id, model)
+            if cached is not None:
+                return cached
+
         component = self.build_component(entity_id, model)
+        fragment = self.outer_div(component)
+
+        if self.cacheable:
+            return fragment_cache.set(self, entity_id, model, fragment)
+
+        return fragment
 
-        return self.outer_div(component)
\ No newline at end of file
+    async def acall(self, entity_id, model):
+        # Build the component on the query executor
+        # so its sql queries don't block the event loop
+        return await run_async(self, entity_id, model)
@@ -0,0 +1,144 @@
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+from employee_events import LRUCache
+
+
+class ChartCache:
+    """
+    Two-tier cache of rendered chart images.
+
+    The memory tier is an LRU bounded by the total size of the stored
+    images. The optional disk tier keeps images in `disk_dir` so they
+    survive restarts and can be shared by several worker processes;
+    it is pruned (oldest first) once it grows past `max_disk_bytes`.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, disk_dir=None, max_disk_bytes=512 * 1024 * 1024):
+        self.memory = LRUCache(max_size=10_000, max_bytes=max_bytes, sizeof=len)
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.max_disk_bytes = max_disk_bytes
+
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._rendering = {}    # key -> [lock held while the key renders, callers using it]
+        self._stats = {'disk_hits': 0, 'disk_misses': 0, 'renders': 0}
+
+    def _disk_path(self, key):
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return self.disk_dir / f"{digest}.chart"
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+
+        try:
+            image = self._disk_path(key).read_bytes()
+        except FileNotFoundError:
+            image = None
+
+        with self._lock:
+            self._stats['disk_hits' if image is not None else 'disk_misses'] += 1
+
+        return image
+
+    def _write_disk(self, key, image):
+        if not self.disk_dir:
+            return
+
+        # write then rename, so readers never see a partial file
+        path = self._disk_path(key)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(image)
+        os.replace(tmp_path, path)
+
+        self._prune_disk()
+
+    def _prune_disk(self):
+        files = [(entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                 for entry in os.scandir(self.disk_dir) if entry.name.endswith('.chart')]
+        total = sum(size for _, size, _ in files)
+
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def get(self, key):
+        """
+        Returns the cached image for `key`, or None
+        """
+        image = self.memory.get(key)
+        if image is not None:
+            return image
+
+        image = self._read_disk(key)
+        if image is not None:
+            self.memory.set(key, image)
+
+        return image
+
+    def get_or_render(self, key, render):
+        """
+        Returns the cached image for `key`, calling `render()`
+        to create (and cache) it on a miss. Concurrent misses for
+        the same key wait for a single render
+        """
+        image = self.get(key)
+        if image is not None:
+            return image
+
+        with self._lock:
+            entry = self._rendering.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+
+        try:
+            with entry[0]:
+                # another thread may have rendered it while we waited
+                image = self.get(key)
+                if image is None:
+                    image = render()
+                    with self._lock:
+                        self._stats['renders'] += 1
+                    self.memory.set(key, image)
+                    self._write_disk(key, image)
+        finally:
+            # the lock is dropped once its last caller is done, so a
+            # caller arriving later either finds the stored image or
+            # shares the lock with the callers still rendering
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._rendering[key]
+
+        return image
+
+    def invalidate(self, predicate=None):
+        """
+        Drops matching images from the memory tier. Disk entries are
+        keyed by data version, so stale ones are never read again
+        and age out through pruning
+        """
+        return self.memory.invalidate(predicate)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update({f"memory_{name}": value for name, value in self.memory.stats().items()})
+        return stats
+
+
+# Shared cache for every chart component.
+# Set DASHBOARD_CHART_CACHE_DIR to enable the disk tier
+chart_cache = ChartCache(
+    max_bytes=int(os.environ.get('DASHBOARD_CHART_CACHE_BYTES', 64 * 1024 * 1024)),
+    disk_dir=os.environ.get('DASHBOARD_CHART_CACHE_DIR'),
+    )
@@ -0,0 +1,262 @@
+import math
+import os
+from abc import ABC, abstractmethod
+from html import escape
+
+import numpy as np
+
+from . import process_renderer
+
+
+class ChartRenderer(ABC):
+    """
+    Turns a chart component's `component_data` into image bytes.
+
+    Subclasses set the `name` charts select them by, and the
+    `extension` and `media_type` the image is served with.
+    """
+
+    name = None
+    extension = None
+    media_type = None
+
+    def supports(self, chart):
+        return True
+
+    @abstractmethod
+    def render(self, chart, data):
+        """
+        Returns the image bytes for `data`
+        """
+
+
+class MatplotlibRenderer(ChartRenderer):
+    """
+    Draws the chart's matplotlib `visualization` to PNG, in a render
+    worker process when those are configured. Renders any chart
+    """
+
+    name = 'matplotlib'
+    extension = 'png'
+    media_type = 'image/png'
+
+    def render(self, chart, data):
+        if process_renderer.renderer is not None:
+            return process_renderer.renderer.render(chart, data)
+
+        return chart.draw_png(data)
+
+
+# Line colors, taken from matplotlib's coolwarm colormap
+LINE_SERIES = [('Positive', '#ee8468'), ('Negative', '#7b9ff9')]
+
+# matplotlib's coolwarm colormap at 0, 0.1, ... 1, for the line chart's colorbar
+COUNT_COLORS = [
+    '#3b4cc0', '#5977e3', '#7b9ff9', '#9ebeff', '#c0d4f5', '#dddcdc',
+    '#f2cbb7', '#f7ac8e', '#ee8468', '#d65244', '#b40426',
+    ]
+
+# Color of an empty bar, for entities without a risk score
+NO_DATA_COLOR = '#d9d9d9'
+
+# matplotlib's RdYlGn_r colormap at 0, 0.1, ... 1 (low risk green, high risk red)
+RISK_COLORS = [
+    '#006837', '#199750', '#66bd63', '#a5d86a', '#d9ef8b', '#fffebe',
+    '#fee08b', '#fdad60', '#f46d43', '#d62f27', '#a50026',
+    ]
+
+
+def risk_color(value):
+    """
+    Returns the RISK_COLORS color for a value between 0 and 1
+    (NO_DATA_COLOR for NaN)
+    """
+    if math.isnan(value):
+        return NO_DATA_COLOR
+
+    position = min(max(value, 0.0), 1.0) * (len(RISK_COLORS) - 1)
+    low = min(int(position), len(RISK_COLORS) - 2)
+    weight = position - low
+
+    start, end = (
+        [int(color[i:i + 2], 16) for i in (1, 3, 5)]
+        for color in RISK_COLORS[low:low + 2]
+        )
+    return '#' + ''.join(f'{round(a + (b - a) * weight):02x}' for a, b in zip(start, end))
+
+
+def nice_step(span, ticks=5):
+    """
+    Returns a 1, 2 or 5 x 10^n tick step that splits `span` into about `ticks` parts
+    """
+    raw = max(span, 1) / (ticks - 1)
+    magnitude = 10 ** math.floor(math.log10(raw))
+    return next(m * magnitude for m in (1, 2, 5, 10) if m * magnitude >= raw)
+
+
+def gradient(id, colors, vertical=False):
+    """
+    Returns a linearGradient through `colors`, left to right
+    (bottom to top when `vertical`)
+    """
+    stops = ''.join(
+        f'<stop offset="{index / (len(colors) - 1):.2f}" stop-color="{color}"/>'
+        for index, color in enumerate(colors)
+        )
+    direction = ' x1="0" y1="1" x2="0" y2="0"' if vertical else ''
+    return f'<defs><linearGradient id="{id}"{direction}>{stops}</linearGradient></defs>'
+
+
+def text(x, y, label, size=12, anchor='middle', **attrs):
+    extra = ''.join(f' {key.replace("_", "-")}="{value}"' for key, value in attrs.items())
+    return (f'<text x="{x:.1f}" y="{y:.1f}" font-size="{size}" '
+            f'text-anchor="{anchor}"{extra}>{escape(str(label))}</text>')
+
+
+class SvgRenderer(ChartRenderer):
+    """
+    Draws the dashboard's line and bar charts as SVG, straight from
+    the NumPy arrays in their `component_data`. It supports the chart
+    kinds it has a method for, other charts fall back to matplotlib
+    """
+
+    name = 'svg'
+    extension = 'svg'
+    media_type = 'image/svg+xml'
+
+    # pixels per inch of the chart's `figsize`
+    scale = 50
+
+    def supports(self, chart):
+        return chart.chart_kind in ('line', 'bar')
+
+    def render(self, chart, data):
+        width, height = (round(size * self.scale) for size in chart.figsize)
+        body = getattr(self, chart.chart_kind)(data, width, height)
+
+        return (
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+            f'viewBox="0 0 {width} {height}" font-family="sans-serif">'
+            f'{"".join(body)}</svg>'
+            ).encode()
+
+    def line(self, data, width, height):
+
+        # the right margin holds the colorbar, as in matplotlib
+        left, right, top, bottom = 70, width - 130, 70, height - 60
+        days = np.asarray(data['dates'], dtype='datetime64[D]').astype(np.int64)
+        series = [(name, np.asarray(data[name], dtype=float), color) for name, color in LINE_SERIES]
+
+        first, last = (days.min(), days.max()) if len(days) else (0, 1)
+        last = max(last, first + 1)
+        highest = max((values.max() for _, values, _ in series if len(values)), default=0)
+        step = nice_step(highest)
+        y_max = step * max(math.ceil(highest / step), 1)
+
+        def x_pos(day):
+            return left + (day - first) / (last - first) * (right - left)
+
+        def y_pos(value):
+            return bottom - value / y_max * (bottom - top)
+
+        body = [text(width / 2, 35, data['title'], size=20)]
+
+        # axes, horizontal grid lines and y labels
+        body.append(f'<path d="M{left},{top}V{bottom}H{right}" fill="none" stroke="black"/>')
+        for tick in np.arange(0, y_max + step / 2, step):
+            y = y_pos(tick)
+            body.append(f'<line x1="{left}" y1="{y:.1f}" x2="{right}" y2="{y:.1f}" stroke="#ddd"/>')
+            body.append(text(left - 8, y + 4, f'{tick:g}', anchor='end'))
+
+        for day in np.linspace(first, last, 5):
+            label = np.datetime64(int(round(day)), 'D')
+            body.append(text(x_pos(day), bottom + 20, label))
+
+        body.append(text((left + right) / 2, height - 15, 'Event Date'))
+        body.append(text(20, (top + bottom) / 2, 'Event Count',
+                         transform=f'rotate(-90 20 {(top + bottom) / 2:.1f})'))
+
+        # one polyline per series
+        x = x_pos(days)
+        for index, (name, values, color) in enumerate(series):
+            points = ' '.join(map('{:.1f},{:.1f}'.format, x, y_pos(values)))
+            body.append(f'<polyline points="{points}" fill="none" stroke="{color}" '
+                        f'stroke-width="3"/>')
+
+            # legend
+            y = top + 10 + index * 20
+            body.append(f'<line x1="{left + 15}" y1="{y}" x2="{left + 40}" y2="{y}" '
+                        f'stroke="{color}" stroke-width="3"/>')
+            body.append(text(left + 48, y + 4, name, anchor='start'))
+
+        # colorbar of the counts, from 0 to the highest count
+        bar_left = right + 30
+        body.append(gradient('counts', COUNT_COLORS, vertical=True))
+        body.append(f'<rect x="{bar_left}" y="{top}" width="16" height="{bottom - top}" '
+                    f'fill="url(#counts)"/>')
+        for tick in np.arange(0, y_max + step / 2, step):
+            if tick > highest:
+                break
+            y = bottom - (tick / highest if highest else 0) * (bottom - top)
+            body.append(text(bar_left + 22, y + 4, f'{tick:g}', anchor='start'))
+
+        label_x = bar_left + 80
+        body.append(text(label_x, (top + bottom) / 2, 'Cumulative Count Intensity',
+                         transform=f'rotate(90 {label_x} {(top + bottom) / 2:.1f})'))
+
+        return body
+
+    def bar(self, data, width, height):
+
+        left, right = 40, width - 40
+        pred = float(data['pred'])
+
+        # employees and teams without events have no risk,
+        # they get an empty bar and a "No data" label
+        fill = risk_color(pred)
+        if math.isnan(pred):
+            pred, label = 0.0, 'No data'
+        else:
+            pred = min(max(pred, 0.0), 1.0)
+            label = f'{pred:.2%}'
+
+        bar_top, bar_height = height * 0.3, height * 0.25
+        scale_top = bar_top + bar_height + 60
+
+        def x_pos(value):
+            return left + value * (right - left)
+
+        body = [
+            gradient('risk', RISK_COLORS),
+            text(width / 2, 35, 'Predicted Recruitment Risk', size=20),
+            f'<rect x="{left}" y="{bar_top:.1f}" width="{x_pos(pred) - left:.1f}" '
+            f'height="{bar_height:.1f}" fill="{fill}" stroke="black"/>',
+            f'<path d="M{left},{bar_top - 10:.1f}V{bar_top + bar_height + 10:.1f}H{right}" '
+            f'fill="none" stroke="black"/>',
+            text(min(x_pos(pred) + 8, right - 60), bar_top + bar_height / 2 + 6,
+                 label, size=16, anchor='start', font_weight='bold'),
+            f'<rect x="{left}" y="{scale_top:.1f}" width="{right - left}" height="16" fill="url(#risk)"/>',
+            text(width / 2, scale_top + 50, 'Risk Level (0 = Low, 1 = High)'),
+            ]
+
+        for tick in np.linspace(0, 1, 6):
+            body.append(text(x_pos(tick), bar_top + bar_height + 30, f'{tick:.1f}'))
+
+        return body
+
+
+renderers = {renderer.name: renderer for renderer in (SvgRenderer(), MatplotlibRenderer())}
+
+# Renderer charts use unless they pick one themselves
+default_renderer = os.environ.get('DASHBOARD_CHART_RENDERER', 'svg')
+
+
+def get_renderer(chart):
+    """
+    Returns the renderer for a chart: the one it asks for
+    when that renderer can draw it, matplotlib otherwise
+    """
+    renderer = renderers.get(chart.renderer_name or default_renderer)
+    if renderer is None or not renderer.supports(chart):
+        renderer = renderers['matplotlib']
+    return renderer
@@ -1,9 +1,17 @@
+from itertools import chain
+
 from .base_component import BaseComponent
-from fasthtml.common import Table, Tr, Th, Td
+from fasthtml.common import Table, Tr, Th, Td, Button, to_xml
 
 
 class DataTable(BaseComponent):
 
+    # Most rows rendered into the page (None renders every row)
+    # The rest are reached through the table's last row, see `more_row`
+    max_rows = None
+
+    # Rows per chunk when the table is streamed
+    chunk_rows = 1000
 
     def build_component(self, entity_id, model):
 
@@ -11,21 +19,98 @@ class DataTable(BaseComponent):
 
             data = self.component_data(entity_id, model)
 
-            table = Table(
-                Tr(
-                    Th(column.title()) for column in data.columns
-                )
+            return Table(
+                self.header_row(data),
+                *self.page_rows(entity_id, model, data),
+            )
+
+    def header_row(self, data):
+
+        return Tr(
+            Th(column.title()) for column in data.columns
+        )
+
+    def build_rows(self, data):
+
+        # build every row in a single pass, rather than
+        # growing the table's children one row at a time
+        return [
+            Tr(
+                Td(val) for val in data_row
             )
+            for data_row in data.to_numpy()
+        ]
+
+    def page_rows(self, entity_id, model, data, offset=0):
+        """
+        Returns the rows of the `max_rows` page starting at `offset`,
+        followed by a `more_row` when more rows follow
+        """
+        if self.max_rows is None:
+            return self.build_rows(data.iloc[offset:])
+
+        end = offset + self.max_rows
+        rows = self.build_rows(data.iloc[offset:end])
+
+        if end < len(data):
+            rows.append(self.more_row(entity_id, model, end, len(data.columns)))
+
+        return rows
+
+    def more_url(self, entity_id, model, after):
+        """
+        Url returning the rows that follow `after` (a row offset, or
+        whatever position the subclass pages by). Subclasses that
+        serve their pages return it to get a "Load more" button
+        """
+        return None
+
+    def more_row(self, entity_id, model, after, colspan):
+        """
+        Last row of a capped table. It swaps itself for the rows
+        after `after` when clicked, or, without a `more_url`,
+        says the table was cut short
+        """
+        url = self.more_url(entity_id, model, after)
+
+        if url is None:
+            return Tr(Td(f'Showing the first {after:,} rows', colspan=colspan))
+
+        return Tr(
+            Td(
+                Button(
+                    'Load more',
+                    hx_get=url,
+                    hx_target='closest tr',
+                    hx_swap='outerHTML',
+                ),
+                colspan=colspan,
+            )
+        )
+
+    def data_chunks(self, entity_id, model):
+        """
+        Yields the table data as DataFrames of at most `chunk_rows` rows
+        (a single empty one when there is no data)
+        """
+        data = self.component_data(entity_id, model)
+
+        for start in range(0, max(len(data), 1), self.chunk_rows):
+            yield data.iloc[start:start + self.chunk_rows]
+
+    def stream(self, entity_id, model):
+        """
+        Yields the whole table as HTML, one chunk of rows at a time,
+        for a streaming response. Only one chunk of rows is held
+        as fasthtml elements at any time, and the first rows are
+        sent before the rest are rendered
+        """
+        chunks = self.data_chunks(entity_id, model)
+        first = next(chunks)
 
-            for data_row in data.to_numpy():
+        yield f'<table>{to_xml(self.header_row(first))}'
 
-                table_row = Tr(
-                    Td(val) for val in data_row
-                )
+        for chunk in chain([first], chunks):
+            yield ''.join(map(to_xml, self.build_rows(chunk)))
 
-                children = (*table.children, table_row)
-                table.children = children
-            
-            return table
-            
-        
\ No newline at end of file
+        yield '</table>'
@@ -0,0 +1,70 @@
+import os
+
+from fasthtml.common import NotStr, to_xml
+
+from employee_events import LRUCache, data_version
+
+
+class FragmentCache:
+    """
+    Memoizes the HTML of `cacheable` components.
+
+    Fragments are keyed on (component, entity id, model name, data
+    version), so a database change makes every stored fragment
+    unreachable and the LRU ages them out. `invalidate` drops
+    fragments explicitly, e.g. after a change the data version
+    does not reflect.
+    """
+
+    def __init__(self, max_size=1024, max_bytes=32 * 1024 * 1024):
+        self.entries = LRUCache(max_size=max_size, max_bytes=max_bytes, sizeof=len)
+
+    def key(self, component, entity_id, model):
+        return (
+            type(component).__name__,
+            id(component),
+            str(entity_id),
+            model.name,
+            data_version(),
+            )
+
+    def get(self, component, entity_id, model):
+        """
+        Returns the stored fragment, or None
+        """
+        html = self.entries.get(self.key(component, entity_id, model))
+        return None if html is None else NotStr(html)
+
+    def set(self, component, entity_id, model, fragment):
+        """
+        Stores the fragment and returns it as rendered HTML
+        """
+        html = to_xml(fragment)
+        self.entries.set(self.key(component, entity_id, model), html)
+        return NotStr(html)
+
+    def invalidate(self, component=None, entity_id=None, model_name=None):
+        """
+        Drops the fragments matching every given argument (all
+        fragments when none is given). `component` may be an
+        instance or a class name. Returns the number dropped
+        """
+        def matches(key):
+            name, component_id, key_entity_id, key_model_name, _ = key
+            if component is not None and component != name and id(component) != component_id:
+                return False
+            if entity_id is not None and str(entity_id) != key_entity_id:
+                return False
+            return model_name is None or model_name == key_model_name
+
+        return self.entries.invalidate(matches)
+
+    def stats(self):
+        return self.entries.stats()
+
+
+# Shared cache for every cacheable component
+fragment_cache = FragmentCache(
+    max_size=int(os.environ.get('DASHBOARD_FRAGMENT_CACHE_SIZE', 1024)),
+    max_bytes=int(os.environ.get('DASHBOARD_FRAGMENT_CACHE_BYTES', 32 * 1024 * 1024)),
+    )
@@ -0,0 +1,29 @@
+from .base_component import BaseComponent
+from fasthtml.common import Div
+
+
+class LazySection(BaseComponent):
+    """
+    Placeholder for a slow section of a page. It renders straight
+    away as a "loading" Div that fetches the section's fragment from
+    `/fragment/{name}/{model name}/{entity id}` once the page has
+    loaded, and is replaced by it. The app answers that url
+    with the output of `component`
+    """
+
+    def __init__(self, name, component):
+        self.name = name
+        self.component = component
+
+    def url(self, entity_id, model):
+        return f'/fragment/{self.name}/{model.name}/{entity_id}'
+
+    def build_component(self, entity_id, model):
+
+        return Div(
+            'Loading…',
+            aria_busy='true',
+            hx_get=self.url(entity_id, model),
+            hx_trigger='load',
+            hx_swap='outerHTML',
+        )
@@ -1,52 +1,171 @@
 from .base_component import BaseComponent
+from .chart_cache import chart_cache
+from .chart_renderers import get_renderer
+from . import process_renderer
 
-import matplotlib.pyplot
 from fasthtml.common import Img
-import matplotlib.pylab as plt
-import matplotlib
+from functools import cache
 import io
 import base64
+import hashlib
 
-# This is necessary to prevent matplotlib from causing memory leaks
-# https://stackoverflow.com/questions/31156578/matplotlib-doesnt-release-memory-after-savefig-and-close
-matplotlib.use('Agg')
-matplotlib.rcParams['savefig.transparent'] = True
-matplotlib.rcParams['savefig.format'] = 'png'
+from employee_events import data_version
 
 
-def matplotlib2fasthtml(func):
+@cache
+def load_matplotlib():
+    """
+    Imports matplotlib and sets the chart defaults, on the first
+    chart drawn with it. Dashboards that only draw with the svg
+    renderer never import matplotlib
+    """
+    import matplotlib
+
+    matplotlib.rcParams['savefig.transparent'] = True
+    matplotlib.rcParams['savefig.format'] = 'png'
+    return matplotlib
+
+
+def matplotlib2png(func):
     '''
-    Copy of https://github.com/koaning/fh-matplotlib, which is currently hardcoding the 
-    image format as jpg. png or svg is needed here.
+    Based on https://github.com/koaning/fh-matplotlib. Creates a
+    Figure with its own Agg canvas, passes it to the drawing function
+    and returns the figure as PNG bytes.
+
+    The figure is never registered with pyplot, so there is no global
+    state to lock or close and charts can render on several threads
+    at once. The figure is freed as soon as it goes out of scope.
     '''
-    def wrapper(*args, **kwargs):
-        # Reset the figure to prevent accumulation. Maybe we need a setting for this?
-        fig = plt.figure()
+    def wrapper(self, *args, **kwargs):
+        load_matplotlib()
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        fig = Figure(figsize=self.figsize)
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
 
         # Run function as normal
-        func(*args, **kwargs)
+        func(self, *args, fig=fig, ax=ax, **kwargs)
 
-        # Store it as base64 and put it into an image.
+        # Store the image as png bytes
         my_stringIObytes = io.BytesIO()
-        plt.savefig(my_stringIObytes)
-        my_stringIObytes.seek(0)
-        my_base64_jpgData = base64.b64encode(my_stringIObytes.read()).decode()
-
-        # Close the figure to prevent memory leaks
-        plt.close(fig)
-        plt.close('all')
-        return Img(src=f'data:image/jpg;base64, {my_base64_jpgData}')
+        fig.savefig(my_stringIObytes)
+        return my_stringIObytes.getvalue()
     return wrapper
 
 
 class MatplotlibViz(BaseComponent):
 
-    @matplotlib2fasthtml
+    # Size of the rendered figure in inches
+    figsize = (12, 9)
+
+    # Charts with a `chart_kind` are served as separate images
+    # from `/chart/{chart_kind}/{model name}/{entity id}.{extension}`
+    # Charts without one are inlined as base64 data
+    chart_kind = None
+
+    # Name of the chart_renderers renderer to draw with
+    # (None uses the DASHBOARD_CHART_RENDERER default)
+    renderer_name = None
+
+    @property
+    def renderer(self):
+        return get_renderer(self)
+
     def build_component(self, entity_id, model):
-        return self.visualization(entity_id, model)
+
+        if self.chart_kind:
+            return Img(src=self.chart_url(entity_id, model))
+
+        my_base64_data = base64.b64encode(self.image(entity_id, model)).decode()
+        return Img(src=f'data:{self.renderer.media_type};base64, {my_base64_data}')
+
+    def image(self, entity_id, model):
+        """
+        Returns the chart image bytes, rendering them only on a cache miss
+        """
+        return chart_cache.get_or_render(
+            self.cache_key(entity_id, model),
+            lambda: self.render_image(entity_id, model),
+            )
+
+    def prerender(self, entity_id, model):
+        """
+        Starts rendering the chart in the background when it is drawn
+        by render processes, and returns the future (None otherwise,
+        the image route then renders it on demand). A request for the
+        image that arrives meanwhile waits for this render instead of
+        starting its own
+        """
+        renderer = process_renderer.renderer
+        if renderer is None or self.renderer.name != 'matplotlib':
+            return None
+
+        return renderer.prerender(self.image, entity_id, model)
+
+    def etag(self, entity_id, model):
+        """
+        Strong ETag for the chart image. It changes whenever
+        the cache key (data version, style, ...) changes
+        """
+        digest = hashlib.sha256(repr(self.cache_key(entity_id, model)).encode()).hexdigest()
+        return f'"{digest[:32]}"'
+
+    def chart_url(self, entity_id, model):
+        # the ETag is repeated in the url, so a new version
+        # gets a new url and browsers can cache each one for good
+        version = self.etag(entity_id, model).strip('"')
+        extension = self.renderer.extension
+        return f'/chart/{self.chart_kind}/{model.name}/{entity_id}.{extension}?v={version}'
+
+    def render_image(self, entity_id, model):
+        """
+        Fetches the chart data and draws it with the chart's renderer
+        """
+        return self.renderer.render(self, self.component_data(entity_id, model))
+
+    @matplotlib2png
+    def draw_png(self, data, fig, ax):
+        return self.visualization(data, fig, ax)
+
+    def style_params(self):
+        """
+        Settings that change the rendered image
+        """
+        params = {
+            'renderer': self.renderer.name,
+            'figsize': self.figsize,
+            }
+
+        # the raster settings only change matplotlib's images
+        if params['renderer'] == 'matplotlib':
+            matplotlib = load_matplotlib()
+            params['dpi'] = matplotlib.rcParams['figure.dpi']
+            params['transparent'] = matplotlib.rcParams['savefig.transparent']
+
+        return params
+
+    def cache_key(self, entity_id, model):
+        """
+        Identifies one rendered image. The database data version is
+        part of the key, so a chart re-renders once its data changes
+        """
+        return (
+            type(self).__name__,
+            model.name,
+            str(entity_id),
+            data_version(),
+            tuple(sorted(self.style_params().items())),
+            )
     
     
-    def visualization(self, entity_id, model):
+    def visualization(self, data, fig, ax):
+        """
+        Draws the `component_data` output onto `fig` and its axis `ax`.
+        Use their methods rather than pyplot, which is not thread-safe.
+        `data` may be sent to a render process, so keep it small
+        """
         pass
 
     def set_axis_styling(self, ax, bordercolor='white', fontcolor='white'):
@@ -0,0 +1,110 @@
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+
+def _warm_worker():
+    # import matplotlib and draw once, so the import and the
+    # font cache load happen before the first real chart
+    import io
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=(1, 1))
+    FigureCanvasAgg(fig)
+    fig.add_subplot().set_title('warm')
+    fig.savefig(io.BytesIO(), format='png')
+
+
+def _render(chart, data):
+    return chart.draw_png(data)
+
+
+class ProcessRenderer:
+    """
+    Rasterizes MatplotlibViz charts in a pool of worker processes.
+
+    Matplotlib holds the GIL while it draws, so charts rendered on
+    threads take turns on one core. The workers only receive the
+    chart component and its compact `component_data`, and send back
+    PNG bytes, so several charts can render on separate cores.
+
+    The workers start on `warm()` or the first render. Where they are
+    forked from the running process (the default on Linux), start them
+    once the chart classes they will draw are defined.
+    """
+
+    def __init__(self, processes=None):
+        self.processes = processes or os.cpu_count()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            initializer=_warm_worker,
+            )
+
+        # Threads that fetch chart data and wait on the workers for
+        # `prerender`, kept apart from the query executor that
+        # serves page requests
+        self._prerender = ThreadPoolExecutor(
+            max_workers=self.processes,
+            thread_name_prefix='chart_prerender',
+            )
+
+    def warm(self):
+        """
+        Starts every worker and waits until they are ready to render
+        """
+        wait([self._executor.submit(os.getpid) for _ in range(self.processes)])
+
+    def submit(self, chart, data):
+        """
+        Returns a future for the chart's PNG bytes
+        """
+        return self._executor.submit(_render, chart, data)
+
+    def render(self, chart, data):
+        return self.submit(chart, data).result()
+
+    def prerender(self, func, *args):
+        """
+        Runs `func(*args)` on a prerender thread and returns the
+        future. Errors are printed, as nobody waits for the result
+        """
+        future = self._prerender.submit(func, *args)
+        future.add_done_callback(_report_error)
+        return future
+
+    def close(self):
+        self._prerender.shutdown(wait=True, cancel_futures=True)
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _report_error(future):
+    if not future.cancelled() and future.exception() is not None:
+        error = future.exception()
+        print("A chart prerender failed:")
+        traceback.print_exception(type(error), error, error.__traceback__)
+
+
+# Charts render in-process unless DASHBOARD_RENDER_PROCESSES
+# is set to the number of worker processes to use
+renderer = None
+
+
+def configure(processes):
+    """
+    Replaces the shared renderer with one using `processes` workers
+    (0 or None renders charts in the calling thread again)
+    """
+    global renderer
+
+    old, renderer = renderer, None
+    if old is not None:
+        old.close()
+
+    if processes:
+        renderer = ProcessRenderer(processes)
+
+    return renderer
+
+
+configure(int(os.environ.get('DASHBOARD_RENDER_PROCESSES', 0)))
@@ -0,0 +1,61 @@
+from .dropdown import Dropdown
+from fasthtml.common import Div, Input, Label, Option, Select
+
+
+class TypeaheadDropdown(Dropdown):
+    """
+    Dropdown for long name lists. It renders a search box and a
+    select holding only the current entity (or the first `limit`
+    names), and replaces the select with the matches from
+    `{search_url}/{model name}?q=...` as the user types
+    """
+
+    search_url = '/search'
+    limit = 10
+
+    @property
+    def results_id(self):
+        return f'{self.id}-results'
+
+    def component_data(self, entity_id, model):
+
+        name = model.display_name(entity_id) if entity_id is not None else None
+        if name is not None:
+            return [(name, entity_id)]
+
+        return model.search_names('', self.limit)
+
+    def build_component(self, entity_id, model):
+
+        search = Input(
+            type='search',
+            id=f'{self.id}-search',
+            name='q',
+            placeholder=f'Search {model.name}s…',
+            autocomplete='off',
+            hx_get=f'{self.search_url}/{model.name}',
+            hx_trigger='input changed delay:200ms, search',
+            hx_target=f'#{self.results_id}',
+            hx_swap='outerHTML',
+        )
+
+        return (
+            Label(model.name.title(), _for=f'{self.id}-search'),
+            search,
+            self.results(entity_id, self.component_data(entity_id, model)),
+        )
+
+    def results(self, entity_id, names):
+        """
+        The select listing `names`, with `entity_id` selected
+        """
+        options = [
+            Option(text, value=value, selected=True if str(value) == str(entity_id) else None)
+            for text, value in names
+        ]
+
+        return Select(*options, name=self.name, id=self.results_id)
+
+    def outer_div(self, child):
+
+        return Div(*child, id=self.id)
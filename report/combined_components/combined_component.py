@@ -1,18 +1,53 @@
+import asyncio
+import copy
+import traceback
+
 from fastcore.xml import FT
 from fasthtml.common import Div
 
+from base_components.fragment_cache import fragment_cache
+
+
+class ChildFragments(list):
+    """
+    The children's fragments in child order, with the
+    children that failed to build in `errors`
+    """
+
+    def __init__(self, fragments=(), errors=()):
+        super().__init__(fragments)
+        self.errors = list(errors)
+
+
 class CombinedComponent:
 
     outer_div_type = Div(cls='container')
 
     children = []
+
+    # Set to True to memoize the combined HTML in `fragment_cache`
+    # (see BaseComponent.cacheable)
+    cacheable = False
+
+    # `acall` builds the children at the same time. Set to False
+    # to build them one after the other
+    concurrent = True
     
     def __call__(self, userid, model):
+
+       if self.cacheable:
+           cached = fragment_cache.get(self, userid, model)
+           if cached is not None:
+               return cached
        
        called_children = self.call_children(userid, model)
        div_args = self.div_args(userid, model)
+       fragment = self.outer_div(called_children, div_args)
 
-       return self.outer_div(called_children, div_args)
+       if self.cacheable:
+           return fragment_cache.set(self, userid, model, fragment)
+
+       return fragment
     
     def call_children(self, userid, model):
 
@@ -25,15 +60,94 @@ class CombinedComponent:
                 called.append(Div(child(userid, model)))
         
         return called
+
+    async def acall(self, userid, model):
+
+        fragment, errors = await self.abuild(userid, model)
+
+        return fragment
+
+    async def abuild(self, userid, model):
+        """
+        Returns the fragment and the children that failed to build,
+        including those of nested combined components
+        """
+        if self.cacheable:
+            cached = fragment_cache.get(self, userid, model)
+            if cached is not None:
+                return cached, []
+
+        called_children = await self.acall_children(userid, model)
+        div_args = self.div_args(userid, model)
+        fragment = self.outer_div(called_children, div_args)
+        errors = getattr(called_children, 'errors', [])
+
+        # a section that failed is retried on the next request
+        if self.cacheable and not errors:
+            return fragment_cache.set(self, userid, model, fragment), errors
+
+        return fragment, errors
+
+    async def acall_children(self, userid, model):
+
+        if self.concurrent:
+            results = await asyncio.gather(
+                *(self.acall_child(child, userid, model) for child in self.children),
+                return_exceptions=True,
+            )
+        else:
+            results = []
+            for child in self.children:
+                try:
+                    results.append(await self.acall_child(child, userid, model))
+                except Exception as error:
+                    results.append(error)
+
+        # a child that raises is replaced by an error message,
+        # the other children are still shown
+        called = ChildFragments()
+        for child, result in zip(self.children, results):
+            if isinstance(result, BaseException) and not isinstance(result, Exception):
+                raise result
+            if isinstance(result, Exception):
+                called.errors.append(child)
+                result = self.child_error(child, result)
+            elif isinstance(child, CombinedComponent):
+                # a nested component's failed children fail this one too
+                result, errors = result
+                called.errors.extend(errors)
+            called.append(Div(result))
+
+        return called
+
+    async def acall_child(self, child, userid, model):
+
+        if isinstance(child, FT):
+            return child()
+
+        if isinstance(child, CombinedComponent):
+            return await child.abuild(userid, model)
+
+        return await child.acall(userid, model)
+
+    def child_error(self, child, error):
+        """
+        Fragment shown in place of a child that failed to build
+        """
+        traceback.print_exception(error)
+        return Div('This section could not be loaded.', cls='section-error')
     
     def div_args(self, userid, model):
         return {}
     
     def outer_div(self, children, div_args):
 
-        self.outer_div_type.children = ()
+        # copy the shared class-level element so
+        # concurrent requests don't fill the same one
+        outer = copy.copy(self.outer_div_type)
+        outer.children = ()
 
-        return self.outer_div_type(
+        return outer(
             *children,
             **div_args
         )
@@ -15,6 +15,12 @@ class FormGroup(CombinedComponent):
 
         return children
 
+    async def acall_children(self, userid, model):
+        children = await super().acall_children(userid, model)
+        children.append(Button(self.button_label))
+
+        return children
+
     def outer_div(self, children, div_args):
 
         return Form(Group(*children), **div_args)
@@ -1,17 +1,16 @@
 from fasthtml.common import *
-import matplotlib.pylab as plt
-from matplotlib import colormaps
-import matplotlib.pyplot
-import matplotlib.cm as cm
-import matplotlib.colors as mcolors
+import os
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-import pandas as pd
+from urllib.parse import quote
 
-# Import QueryBase, Employee, Team from employee_events
-from employee_events import QueryBase, Employee, Team
+# Import Employee, Team from employee_events
+from employee_events import Employee, Team, run_async
+from employee_events.result_cache import result_cache
 
-# import the load_model function from the utils.py file
-from utils import load_model
+# import the shared model server, which loads
+# assets/model.pkl on first use and reloads it when it changes
+from model_serving import model_server
 
 """
 Below, we import the parent classes
@@ -19,11 +18,15 @@ used for subclassing
 """
 from base_components import (
     Dropdown,
+    TypeaheadDropdown,
     BaseComponent,
     Radio,
     MatplotlibViz,
-    DataTable
+    DataTable,
+    LazySection,
+    process_renderer,
     )
+from base_components.chart_cache import chart_cache
 
 from combined_components import FormGroup, CombinedComponent
 
@@ -31,6 +34,9 @@ from combined_components import FormGroup, CombinedComponent
 # Create a subclass of base_components/dropdown
 # called `ReportDropdown`
 class ReportDropdown(Dropdown):
+
+    # The names list only changes with the database
+    cacheable = True
     
     # Overwrite the build_component method
     # ensuring it has the same parameters
@@ -57,10 +63,20 @@ class ReportDropdown(Dropdown):
         return model.names() # returns a list of tuples containing the employee/team names and id's
         
 
+# Create a subclass of base_components/TypeaheadDropdown
+# called `ReportTypeahead`. The filters use it instead of
+# ReportDropdown, so pages no longer list every employee
+class ReportTypeahead(TypeaheadDropdown):
+
+    cacheable = True
+
+
 # Create a subclass of base_components/BaseComponent
 # called `Header`
 class Header(BaseComponent):
 
+    cacheable = True
+
     # Overwrite the `build_component` method
     # Ensure the method has the same parameters
     # as the parent class
@@ -75,10 +91,13 @@ class Header(BaseComponent):
 # Create a subclass of base_components/MatplotlibViz
 # called `LineChart`
 class LineChart(MatplotlibViz):
+
+    # Served from /chart/line/{model}/{id}.svg (.png with matplotlib)
+    chart_kind = 'line'
     
-    # Overwrite the parent class's `visualization`
+    # Overwrite the parent class's `component_data`
     # method. Use the same parameters as the parent
-    def visualization(self, entity_id, model):
+    def component_data(self, entity_id, model):
         
         # Pass the `asset_id` {entity_id rather ??} argument to
         # the model's `event_counts` method to
@@ -99,28 +118,39 @@ class LineChart(MatplotlibViz):
         # in the dataframe to cumulative counts
         df_EventCounts = df_EventCounts.cumsum()
         
-        
-        # Set the dataframe columns to the list
-        # ['Positive', 'Negative']
-        df_EventCounts.columns = ['Positive', 'Negative']
-        
-        # Initialize a pandas subplot
-        # and assign the figure and axis
-        # to variables
-        fig, ax = plt.subplots(figsize=(12,9))
+        # Return the dates and the cumulative
+        # ['Positive', 'Negative'] counts as arrays
+        # (this is all a render process needs to draw the chart)
+        return {
+            'title': f'{model.name.title()} Cumulative Events',
+            'dates': df_EventCounts.index.to_numpy(),
+            'Positive': df_EventCounts['positive_events'].to_numpy(),
+            'Negative': df_EventCounts['negative_events'].to_numpy(),
+        }
+
+    # Overwrite the parent class's `visualization`
+    # method. Use the same parameters as the parent
+    def visualization(self, data, fig, ax):
 
+        # matplotlib is only imported once a chart is drawn with it
+        # (the default svg renderer does not use `visualization`)
+        from matplotlib import colormaps
+        import matplotlib.cm as cm
+        import matplotlib.colors as mcolors
 
         # To add a color scale/intensity to the visualisation:
         # create and choose a colormap (eg: 'viridis', 'RdYlGn', 'coolwarm')
         cmap = colormaps.get_cmap('coolwarm')
         
         # plot lines using colors from the color map
-        df_EventCounts['Positive'].plot(ax=ax, color=cmap(0.8), label='Positive')
-        df_EventCounts['Negative'].plot(ax=ax, color=cmap(0.2), label='Negative')
+        # (on the axis directly, pandas plotting goes through pyplot)
+        ax.plot(data['dates'], data['Positive'], color=cmap(0.8), label='Positive')
+        ax.plot(data['dates'], data['Negative'], color=cmap(0.2), label='Negative')
         
         # create a ScalarMapable to generate the colorbar
         # Normalise defines the data range the color scale represents
-        norm = mcolors.Normalize(vmin = df_EventCounts.min().min(), vmax=df_EventCounts.max().max())
+        counts = np.concatenate([data['Positive'], data['Negative']])
+        norm = mcolors.Normalize(vmin = counts.min(initial=0), vmax=counts.max(initial=0))
         sm = cm.ScalarMappable(cmap=cmap, norm = norm)
         sm.set_array([]) #required for matplotlib to link data to the bar
 
@@ -138,7 +168,7 @@ class LineChart(MatplotlibViz):
         self.set_axis_styling(ax, bordercolor='black', fontcolor='black')
         
         # Set title and labels for x and y axis
-        ax.set_title(f'{model.name.title()} Cumulative Events', fontsize=20, pad = 20)
+        ax.set_title(data['title'], fontsize=20, pad = 20)
         ax.set_xlabel('Event Date', fontsize = 12)
         ax.set_ylabel('Event Count', fontsize = 12)
         ax.legend()
@@ -148,48 +178,45 @@ class LineChart(MatplotlibViz):
 # called `BarChart`
 class BarChart(MatplotlibViz):
 
-    # Create a `predictor` class attribute
-    # assign the attribute to the output
-    # of the `load_model` utils function
-    predictor = load_model()
+    # Served from /chart/bar/{model}/{id}.svg (.png with matplotlib)
+    chart_kind = 'bar'
 
-    # Overwrite the parent class `visualization` method
+    # Overwrite the parent class `component_data` method
     # Use the same parameters as the parent
-    def visualization(self, entity_id, model):
-        
-        # Using the model and asset_id {'entity_id ?} arguments
-        # pass the `asset_id` to the `.model_data` method
-        # to receive the data that can be passed to the machine
-        # learning model
-        df_modelData = model.model_data(entity_id)
-        
-        # Using the predictor class attribute
-        # pass the data to the `predict_proba` method
-        probablilities = self.predictor.predict_proba(df_modelData)
-        
-        # Index the second column of predict_proba output
-        # The shape should be (<number of records>, 1)
-        prob_positive_class = probablilities[:,[1]] # change the single column to a 2D array format which sckit-learn needs for futher processing
-        #prob_positive_class = probablilities[:,1].reshape(-1,1) # can also use this method to do the line above        
+    def component_data(self, entity_id, model):
         
-        # Below, create a `pred` variable set to
-        # the number we want to visualize
+        # Pass the entity_id to the shared model server
+        # It reads the precomputed score from the risk_scores
+        # table (see risk_scoring.py) and, when that table is
+        # out of date, scores the employee, or every member of
+        # the team at once, in a single `predict_proba` call
         #
         # If the model's name attribute is "team"
-        # We want to visualize the mean of the predict_proba output
-        pred = None
+        # the score is the mean of its members' risk
+        # Otherwise it is the employee's own risk
+        pred = model_server.risk(entity_id, model)
 
-        if model.name == 'team':
-              pred = prob_positive_class.mean()
+        # The risk scalar is all the chart needs
+        return {'pred': float(pred)}
+
+    # Overwrite the parent class `visualization` method
+    # Use the same parameters as the parent
+    def visualization(self, data, fig, ax):
+
+        # imported on first use, as in LineChart
+        from matplotlib import colormaps
+        import matplotlib.cm as cm
+        import matplotlib.colors as mcolors
+
+        pred = data['pred']
+
+        # Employees and teams without events have no risk
+        # Draw an empty bar labelled "No data" for them
+        no_data = np.isnan(pred)
+        label = 'No data' if no_data else f'{pred:.2%}'
+        if no_data:
+            pred = 0.0
 
-        # Otherwise set `pred` to the first value
-        # of the predict_proba output
-        else:
-            pred = prob_positive_class[0,0] # ensure we select the first value from the 2D array to pass into ax.barh which needs a 1D scalar
-        
-        # Initialize a matplotlib subplot
-        fig, ax = plt.subplots(figsize=(12,9))
-        
         # To add a color scale/intensity to the plot:
         # Setup the Color Scale
         # 'RdYlGn_r' goes from Green (low risk) to Red (high risk)
@@ -215,7 +242,26 @@ class BarChart(MatplotlibViz):
         self.set_axis_styling(ax = ax, bordercolor='black', fontcolor='black')
 
         # Add a text label on the bar showing the exact percentage
-        ax.text(pred + 0.01, 0, f'{pred:.2%}', va='center', fontsize=14, fontweight='bold')
+        ax.text(pred + 0.01, 0, label, va='center', fontsize=14, fontweight='bold')
+
+    # The risk depends on the served model, so its version is part of
+    # the chart's cache key and url, and a reloaded model redraws it
+    def style_params(self):
+        return {**super().style_params(), 'model_version': model_server.version}
+
+
+# Drop the risk charts and stored scores cached
+# for a model once a reloaded model replaces it
+def drop_risk_caches(old_version, new_version):
+
+    chart_cache.invalidate(
+        lambda key: key[0] == BarChart.__name__ and ('model_version', old_version) in key[-1]
+        )
+    result_cache.invalidate(
+        lambda key: key[1] == 'risk_score' and key[2][-1] == old_version
+        )
+
+model_server.listeners.append(drop_risk_caches)
 
  
 # Create a subclass of combined_components/CombinedComponent
@@ -230,26 +276,92 @@ class Visualizations(CombinedComponent):
 
     # Leave this line unchanged
     outer_div_type = Div(cls='grid')
+
+    async def acall_children(self, entity_id, model):
+
+        # With render processes enabled, start rendering both charts
+        # at the same time on separate cores. The page does not wait
+        # for them, its image requests pick up the renders
+        for chart in self.children:
+            chart.prerender(entity_id, model)
+
+        return await super().acall_children(entity_id, model)
             
 # Create a subclass of base_components/DataTable
 # called `NotesTable`
 class NotesTable(DataTable):
 
+    # The first page is memoized, the later pages are
+    # answered from the query result cache
+    cacheable = True
+
+    # Number of notes rendered per page
+    max_rows = 25
+
     # Overwrite the `component_data` method
     # using the same parameters as the parent class
-    def component_data(self, entity_id, model):
+    def component_data(self, entity_id, model, cursor=None):
         """
-        Returns a Pandas DataFrame of the 'notes' table containing notes about employees and teams
+        Returns one page of the 'notes' table containing notes about employees and teams
+        as a (Pandas DataFrame, next page cursor) tuple, newest notes first
 
         """         
         # Using the model and entity_id arguments
-        # pass the entity_id to the model's .notes 
+        # pass the entity_id to the model's .notes_page
         # method. Return the output
-        return model.notes(entity_id).sort_values(by='note_date', ascending=False)
+        return model.notes_page(entity_id, self.max_rows, cursor)
+
+    def build_component(self, entity_id, model):
+
+        # Render the first page, followed by a "load more"
+        # row when the entity has more notes
+        page, cursor = self.component_data(entity_id, model)
+
+        return Table(
+            self.header_row(page),
+            *self.cursor_rows(entity_id, model, page, cursor),
+        )
+
+    def more_rows(self, entity_id, model, cursor):
+        """
+        Returns the rows of the page after `cursor`, which
+        replace the "load more" row that requested them
+        """
+        page, cursor = self.component_data(entity_id, model, cursor)
+
+        return self.cursor_rows(entity_id, model, page, cursor)
+
+    def cursor_rows(self, entity_id, model, page, cursor):
+        """
+        Keyset version of `page_rows`: the rows of `page`, followed
+        by a "load more" row when `cursor` says more notes follow
+        """
+        rows = self.build_rows(page)
+        if cursor is not None:
+            rows.append(self.more_row(entity_id, model, cursor, 2))
+
+        return rows
+
+    def more_url(self, entity_id, model, cursor):
+        return f'/notes/{model.name}/{entity_id}?cursor={quote(cursor)}'
+
+    def data_chunks(self, entity_id, model):
+
+        # Stream every note in `chunk_rows` keyset pages. The pages
+        # skip the result cache, a full export would only flush it
+        cursor = None
+
+        while True:
+            page, cursor = model.fetch_notes_page(entity_id, self.chunk_rows, cursor)
+            yield page
+            if cursor is None:
+                break
     
 
 class DashboardFilters(FormGroup):
 
+    cacheable = True
+
     id = "top-filters"          # id, action and method defined for the HTML form (**div_args for the form)
     action = "/update_data"
     method="POST"
@@ -261,7 +373,7 @@ class DashboardFilters(FormGroup):
             hx_get='/update_dropdown',
             hx_target='#selector'
             ),
-        ReportDropdown(
+        ReportTypeahead(
             id="selector",
             name="user-selection")
         ]
@@ -284,6 +396,26 @@ class Report(CombinedComponent):
         NotesTable(),
     ]
 
+
+# The same report, sent in two steps: the header and filters
+# right away, the charts and notes as soon as the page loads
+# (each from its own request, so they are fetched in parallel)
+class ProgressiveReport(Report):
+
+    children = [
+        *Report.children[:2],
+        LazySection('visualizations', Report.children[2]),
+        LazySection('notes', Report.children[3]),
+    ]
+
+
+# Sections served from /fragment/{section}/{model}/{id}
+sections = {
+    child.name: child.component
+    for child in ProgressiveReport.children
+    if isinstance(child, LazySection)
+}
+
 # Initialize a fasthtml app
 
 # Define an emoji favicon link 😎
@@ -300,19 +432,89 @@ app, route = fast_app(
 )
 
 # Initialize the `Report` class
-report = Report()
+# (DASHBOARD_PROGRESSIVE=0 sends every section in the first response)
+if os.environ.get('DASHBOARD_PROGRESSIVE', '1') == '0':
+    report = Report()
+else:
+    report = ProgressiveReport()
+
+# Start the chart render processes, when they are enabled,
+# now that the chart classes they draw are all defined
+if process_renderer.renderer is not None:
+    process_renderer.renderer.warm()
+
+# Reload assets/model.pkl when it is replaced, checking every
+# DASHBOARD_MODEL_RELOAD_INTERVAL seconds (0 turns it off).
+# The watcher runs while the app does, importing this module
+# (as the tests and benchmarks do) does not start it
+reload_interval = float(os.environ.get('DASHBOARD_MODEL_RELOAD_INTERVAL', 5))
+
+def start_model_watcher():
+    if reload_interval > 0:
+        model_server.watch(reload_interval)
+
+app.add_event_handler('startup', start_model_watcher)
+app.add_event_handler('shutdown', model_server.stop)
+
+
+def warm_up():
+    """
+    Loads the model and fills the caches behind the entity
+    pickers and the landing page, so the first requests a
+    new replica gets are served warm
+    """
+    model_server.model
+
+    for model in (Employee(), Team()):
+        model.search_names('')
+
+    report(1, Employee())
+    for section in sections.values():
+        section(1, Employee())
+    for chart in Visualizations.children:
+        chart.image(1, Employee())
+
+# Warm up in the background once the app starts, on a thread
+# of its own so requests never queue behind it on the query
+# executor. `/ready` reports when it is done
+warmup = None
+
+def start_warm_up():
+    global warmup
+
+    warming = ThreadPoolExecutor(max_workers=1, thread_name_prefix='warm_up')
+    warmup = warming.submit(warm_up)
+    warming.shutdown(wait=False)
+
+app.add_event_handler('startup', start_warm_up)
+
+
+# Readiness probe for the load balancer
+# 503 until the warm up finished, 200 afterwards
+@route('/ready')
+def get():
+
+    if warmup is None or not warmup.done():
+        return JSONResponse({'ready': False}, status_code=503)
+
+    error = warmup.exception()
+    if error is not None:
+        return JSONResponse({'ready': False, 'error': repr(error)}, status_code=503)
+
+    return JSONResponse({'ready': True, 'model_version': model_server.version})
 
 
 # Create a route for a get request
 # Set the route's path to the root
 @route("/")
-def get():
+async def get():
 
     # Call the initialized report
     # pass the integer 1 and an instance
     # of the Employee class as arguments
     # Return the result
-    return report(1, Employee())
+    # (`acall` builds the report off the event loop)
+    return await report.acall(1, Employee())
 
 # Create a route for a get request
 # Set the route's path to receive a request
@@ -320,15 +522,16 @@ def get():
 # will return the page for the employee with
 # an ID of `2`. 
 # parameterize the employee ID 
-# to a string datatype
+# to an integer datatype, so a
+# non-numeric ID answers 404
 @route('/employee/{id}')
-def get(id:str):
+async def get(id:int):
 
     # Call the initialized report
     # pass the ID and an instance
     # of the Employee SQL class as arguments
     # Return the result
-    return report(id, Employee())
+    return await report.acall(id, Employee())
 
 # Create a route for a get request
 # Set the route's path to receive a request
@@ -336,27 +539,140 @@ def get(id:str):
 # will return the page for the team with
 # an ID of `2`. 
 # parameterize the team ID 
-# to a string datatype
+# to an integer datatype, so a
+# non-numeric ID answers 404
 @route('/team/{id}')
-def get(id:str):
+async def get(id:int):
     
     # Call the initialized report
     # pass the id and an instance
     # of the Team SQL class as arguments
     # Return the result
-   return report(id, Team())
+    return await report.acall(id, Team())
+
+
+# Map the model names used in urls to the employee_events classes
+models = {
+    'employee': Employee,
+    'team': Team,
+}
+
+# Create a route for the sections of the progressive report
+@route('/fragment/{section}/{model_name}/{id}')
+async def get(section:str, model_name:str, id:int):
+
+    if section not in sections or model_name not in models:
+        return Response('Unknown section', status_code=404)
+
+    component = sections[section]
+
+    # htmx only swaps in successful responses, so a failing
+    # section answers with an error message rather than a 500
+    try:
+        return await component.acall(id, models[model_name]())
+    except Exception as error:
+        return report.child_error(component, error)
+
+
+# Create a route for the typeahead search
+# It returns the select listing the top `limit` name matches
+@route('/search/{model_name}')
+async def get(model_name:str, q:str='', limit:int=10):
+
+    if model_name not in models:
+        return Response('Unknown model', status_code=404)
+
+    typeahead = DashboardFilters.children[1]
+    matches = await models[model_name]().asearch_names(q, min(max(limit, 1), 50))
+
+    return typeahead.results(None, matches)
+
+
+# Create a route for the notes table's "load more" button
+# It returns the next page of rows for an employee or team
+@route('/notes/{model_name}/{id}')
+async def get(model_name:str, id:int, cursor:str):
+
+    if model_name not in models:
+        return Response('Unknown model', status_code=404)
+
+    model = models[model_name]()
+    notes_table = Report.children[-1]
+
+    try:
+        return await run_async(notes_table.more_rows, id, model, cursor)
+    except ValueError:
+        return Response('Invalid cursor', status_code=400)
+
+
+# Create a route that streams every note of an employee or team
+# as one table, sending the rows as they are rendered
+@route('/notes/{model_name}/{id}/all')
+async def get(model_name:str, id:int):
+
+    if model_name not in models:
+        return Response('Unknown model', status_code=404)
+
+    model = models[model_name]()
+    notes_table = Report.children[-1]
+
+    return StreamingResponse(notes_table.stream(id, model), media_type='text/html')
+
+
+# Chart components by the `chart_kind` used in their image urls
+charts = {chart.chart_kind: chart for chart in Visualizations.children}
+
+# Create a route for the chart images
+# The response carries a strong ETag, so repeat requests
+# are answered with 304 Not Modified without any rendering
+@app.get('/chart/{kind}/{model_name}/{id}.{ext}')
+async def chart_image(request, kind:str, model_name:str, id:int, ext:str):
+
+    if kind not in charts or model_name not in models:
+        return Response('Unknown chart', status_code=404)
+
+    chart = charts[kind]
+    model = models[model_name]()
+    renderer = chart.renderer
+
+    if ext != renderer.extension:
+        return Response('Unknown chart', status_code=404)
+    etag = chart.etag(id, model)
+
+    # urls carrying the current version never change content,
+    # anything else has to be revalidated
+    if request.query_params.get('v') == etag.strip('"'):
+        cache_control = 'public, max-age=31536000, immutable'
+    else:
+        cache_control = 'no-cache'
+
+    headers = {'ETag': etag, 'Cache-Control': cache_control}
+
+    if request.headers.get('if-none-match') == etag:
+        return Response(status_code=304, headers=headers)
+
+    image = await run_async(chart.image, id, model)
+
+    return Response(image, media_type=renderer.media_type, headers=headers)
+
+# fast_app registers a catch-all static file route for paths
+# ending in .png, .svg (and other static extensions). Move the chart
+# route in front of it so chart urls are matched first
+chart_route = next(r for r in app.routes if getattr(r, 'path', None) == '/chart/{kind}/{model_name}/{id}.{ext}')
+app.routes.remove(chart_route)
+app.routes.insert(0, chart_route)
 
 
 # Keep the below code unchanged!
 @app.get('/update_dropdown{r}')
-def update_dropdown(r):
+async def update_dropdown(r):
     
     dropdown = DashboardFilters.children[1] # refering to the ReportDropdown in the children of Dashboard filters
     print('PARAM', r.query_params['profile_type'])
     if r.query_params['profile_type'] == 'Team':
-        return dropdown(None, Team())
+        return await dropdown.acall(None, Team())
     elif r.query_params['profile_type'] == 'Employee':
-        return dropdown(None, Employee())
+        return await dropdown.acall(None, Employee())
 
 
 @app.post('/update_data')
@@ -0,0 +1,121 @@
+"""
+Portable export of the recruitment risk model
+
+`assets/model.pkl` is a binary scikit-learn LogisticRegression. Its
+probabilities only need the coefficients and the intercept, so
+`export_model` writes those to `assets/model.json` and `LogisticScorer`
+reproduces `predict_proba` with NumPy alone, without importing
+scikit-learn or paying for its input validation on every call.
+
+The export records the sha256 of the pickle it came from, and
+`load_scorer` only uses it while it still matches `model.pkl`.
+
+Usage:
+    python report/linear_model.py [model.pkl] [model.json]
+"""
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from utils import load_model, model_path, model_json_path
+
+
+def file_sha256(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def model_version(path=model_path):
+    """
+    Short version string of the pickled model, from its content
+    """
+    return file_sha256(path)[:12]
+
+
+def export_model(source=model_path, target=model_json_path):
+    """
+    Writes the coefficients of the pickled binary LogisticRegression
+    at `source` to a JSON file at `target`. Returns the exported dict
+    """
+    model = load_model(source)
+
+    coef = np.asarray(getattr(model, 'coef_', None), dtype='float64')
+    if type(model).__name__ != 'LogisticRegression' or coef.shape[:1] != (1,):
+        raise ValueError(f"Only binary LogisticRegression models can be exported, got {type(model).__name__}")
+
+    exported = {
+        'model': 'LogisticRegression',
+        'features': [str(feature) for feature in model.feature_names_in_],
+        'coef': coef[0].tolist(),
+        'intercept': float(np.asarray(model.intercept_)[0]),
+        'classes': np.asarray(model.classes_).tolist(),
+        'source_sha256': file_sha256(source),
+        }
+
+    Path(target).write_text(json.dumps(exported, indent=2))
+    return exported
+
+
+class LogisticScorer:
+    """
+    NumPy version of a binary LogisticRegression's `predict_proba`
+    """
+
+    def __init__(self, features, coef, intercept, classes=(0, 1), **_):
+        self.features = list(features)
+        self.feature_names_in_ = np.asarray(features, dtype=object)
+        self.coef = np.asarray(coef, dtype='float64')
+        self.intercept = float(intercept)
+        self.classes_ = np.asarray(classes)
+
+    @classmethod
+    def from_json(cls, path=model_json_path):
+        return cls(**json.loads(Path(path).read_text()))
+
+    def decision_function(self, X):
+        # DataFrames are read by column name, arrays by position
+        if hasattr(X, 'columns'):
+            if list(X.columns) != self.features:
+                X = X[self.features]
+            X = X.to_numpy(dtype='float64')
+
+        return np.asarray(X, dtype='float64') @ self.coef + self.intercept
+
+    def predict_proba(self, X):
+        z = self.decision_function(X)
+
+        # 1 / (1 + exp(-z)), without overflowing for large |z|
+        positive = np.exp(-np.logaddexp(0, -z))
+        return np.column_stack([1 - positive, positive])
+
+
+def load_scorer(source=model_path, exported=model_json_path):
+    """
+    Returns a LogisticScorer from the JSON export when it was made from
+    the current `model.pkl`, and the unpickled model otherwise
+    """
+    try:
+        scorer = json.loads(Path(exported).read_text())
+    except FileNotFoundError:
+        return load_model(source)
+
+    if scorer.get('source_sha256') != file_sha256(source):
+        return load_model(source)
+
+    return LogisticScorer(**scorer)
+
+
+def main(argv):
+
+    source = Path(argv[0]) if argv else model_path
+    target = Path(argv[1]) if len(argv) > 1 else model_json_path
+
+    exported = export_model(source, target)
+    print(f"Exported {exported['model']} over {exported['features']} to {target}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,234 @@
+import os
+import threading
+
+import numpy as np
+
+from employee_events import Employee
+from employee_events.sql_execution import load_pandas
+
+from linear_model import load_scorer, model_version
+from utils import model_path
+
+
+# Columns of `model_data` the model was trained on
+FEATURES = ['positive_events', 'negative_events']
+
+
+def sample_features(size=100):
+    """
+    Model data of up to `size` employees, plus an all zero row,
+    used to check a model before it is served
+    """
+    employee = Employee()
+    ids = [entity_id for _, entity_id in employee.names()[:size]]
+
+    pd = load_pandas()
+
+    zeros = pd.DataFrame([[0] * len(FEATURES)], columns=FEATURES)
+    return pd.concat([employee.model_data_many(ids)[FEATURES], zeros], ignore_index=True)
+
+
+def file_stat(path):
+    """
+    Returns a token that changes whenever the file at `path` does
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class ModelServer:
+    """
+    Serves the recruitment risk model.
+
+    The model is loaded on first use, once, however many threads
+    ask for it at the same time. By default that is the NumPy export
+    of model.pkl when it is up to date, and the pickle otherwise.
+    `score` rates any number of employees or teams with a single
+    vectorized `predict_proba` call, and `risk` reads the score
+    stored in the risk_scores table when it is current.
+
+    `reload` loads a changed `source` file, checks it on a sample
+    batch and swaps it in, and `watch` calls it from a background
+    thread whenever the file changes. Requests keep using the old
+    model until the swap, which replaces the (model, version) pair
+    in one assignment, and then each `listeners` callback is called
+    with the old and new versions to drop what the old model cached.
+    """
+
+    # Times `load` reads a file that keeps being replaced before giving up
+    load_attempts = 3
+
+    def __init__(self, loader=load_scorer, source=model_path, sample=None):
+        self.loader = loader
+        self.source = source
+        self.sample = sample or sample_features
+        self.listeners = []
+        self._current = None        # (model, version)
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def load(self):
+        """
+        Loads `source` and returns (model, version). Raises
+        RuntimeError when the file is replaced during each
+        of `load_attempts` loads
+        """
+        for _ in range(self.load_attempts):
+            version = model_version(self.source)
+            model = self.loader(self.source)
+
+            # the file was replaced while it loaded, load the new one
+            if model_version(self.source) == version:
+                return model, version
+
+        raise RuntimeError(f"{self.source} changed during {self.load_attempts} loads")
+
+    def current(self):
+        """
+        Returns the (model, version) being served, loading it on first use
+        """
+        current = self._current
+        if current is None:
+            with self._lock:
+                if self._current is None:
+                    self._current = self.load()
+                current = self._current
+        return current
+
+    @property
+    def model(self):
+        return self.current()[0]
+
+    @property
+    def version(self):
+        """
+        Version of the served model
+        """
+        return self.current()[1]
+
+    @property
+    def loaded(self):
+        return self._current is not None
+
+    def validate(self, model):
+        """
+        Raises ValueError unless `model` returns a probability
+        for each class and each row of the sample batch
+        """
+        sample = self.sample()[FEATURES]
+        probabilities = np.asarray(model.predict_proba(sample), dtype='float64')
+
+        if probabilities.shape != (len(sample), 2):
+            raise ValueError(f"expected {(len(sample), 2)} probabilities, got {probabilities.shape}")
+        if not np.isfinite(probabilities).all() or ((probabilities < 0) | (probabilities > 1)).any():
+            raise ValueError("probabilities outside [0, 1]")
+        if not np.allclose(probabilities.sum(axis=1), 1):
+            raise ValueError("class probabilities do not sum to 1")
+
+    def reload(self):
+        """
+        Loads `source` when its version differs from the served
+        model's, validates it and swaps it in. A model that fails
+        to load or validate is reported and the old one kept.
+        Returns True when a new model was swapped in
+        """
+        with self._reload_lock:
+            old = self._current
+
+            try:
+                if old is not None and model_version(self.source) == old[1]:
+                    return False
+
+                model, version = self.load()
+                self.validate(model)
+
+            except Exception as e:
+                print(f"Model {self.source} was not reloaded: {e}")
+                return False
+
+            self._current = (model, version)
+
+        if old is not None:
+            for listener in self.listeners:
+                listener(old[1], version)
+
+        return True
+
+    def watch(self, interval=5.0):
+        """
+        Starts a daemon thread checking `source` every `interval`
+        seconds and reloading it when its size or modification
+        time changed
+        """
+        if self._watcher is not None:
+            return self._watcher
+
+        self._stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval,), name='model_watcher', daemon=True,
+            )
+        self._watcher.start()
+        return self._watcher
+
+    def _watch(self, interval):
+        seen = file_stat(self.source)
+
+        while not self._stop.wait(interval):
+            stat = file_stat(self.source)
+            if stat != seen:
+                seen = stat
+                self.reload()
+
+    def stop(self):
+        """
+        Stops the watcher thread
+        """
+        if self._watcher is not None:
+            self._stop.set()
+            self._watcher.join()
+            self._watcher = None
+
+    def predict(self, features):
+        """
+        Returns the positive class probability for each row of `features`
+        """
+        return self.model.predict_proba(features[FEATURES])[:, 1]
+
+    def score(self, ids, model):
+        """
+        Returns the risk of every id in `ids` as a Series indexed
+        by id (NaN for ids without data). Employees are scored on
+        their own events, teams get the mean risk of their members
+        """
+        pd = load_pandas()
+
+        ids = [int(entity_id) for entity_id in ids]
+        data = model.model_data_many(ids)
+
+        if data.empty:
+            return pd.Series(float('nan'), index=ids, dtype='float64')
+
+        risk = pd.Series(self.predict(data), index=data.index)
+
+        return risk.groupby(data[f'{model.name}_id']).mean().reindex(ids)
+
+    def risk(self, entity_id, model):
+        """
+        Returns the risk of one employee or team, read from the
+        risk_scores table when it is current for this model and
+        scored live otherwise
+        """
+        stored = model.risk_score(int(entity_id), self.version)
+        if stored is not None:
+            return stored
+
+        return self.score([entity_id], model).iloc[0]
+
+
+# Shared model server for the dashboard
+model_server = ModelServer()
@@ -0,0 +1,34 @@
+"""
+Writes the recruitment risk of every employee and team
+to the risk_scores table of employee_events.db
+
+Only the employees and teams with events added since the last run
+are re-scored, unless the model changed or `--rebuild` is given.
+The dashboard reads these scores instead of predicting them on each
+request while they are current, see employee_events/risk_scores.py.
+
+Usage:
+    python report/risk_scoring.py [--rebuild] [db_path]
+"""
+import sys
+from pathlib import Path
+
+from employee_events import refresh_risk_scores
+from employee_events.sql_execution import db_path
+
+from model_serving import model_server
+
+
+def main(argv):
+
+    rebuild = '--rebuild' in argv
+    args = [arg for arg in argv if arg != '--rebuild']
+    path = Path(args[0]) if args else db_path
+
+    scored = refresh_risk_scores(model_server.predict, model_server.version, path, rebuild=rebuild)
+    print(f"Scored {scored} employee(s) and team(s) with model {model_server.version}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -11,9 +11,12 @@ project_root = Path(__file__).parent.parent.resolve()  #assuming the project roo
 # inside the assets directory
 model_path = project_root / 'assets' / 'model.pkl'
 
-def load_model():
+# NumPy export of the same model, see linear_model.py
+model_json_path = project_root / 'assets' / 'model.json'
 
-    with model_path.open('rb') as file:
+def load_model(path=model_path):
+
+    with Path(path).open('rb') as file:
         model = pickle.load(file)
 
     return model
\ No newline at end of file
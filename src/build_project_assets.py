@@ -1,8 +1,11 @@
 import pandas as pd
 from pathlib import Path
 import numpy as np
-import random, pickle, json
+import random, pickle, json, sys
 from sqlite3 import connect
+from employee_events.schema import migrate
+from employee_events.rollups import rebuild_rollups
+from employee_events.risk_scores import refresh_risk_scores
 from datetime import timedelta, date
 from sklearn.linear_model import LogisticRegression
 from scipy.stats import norm, expon, uniform, skewnorm
@@ -10,6 +13,13 @@ from scipy.stats import norm, expon, uniform, skewnorm
 
 cwd = Path('.').resolve()
 
+# the model is exported and scored with the dashboard's modules
+sys.path.insert(0, str(cwd.parent / 'report'))
+
+from linear_model import export_model
+from model_serving import model_server
+
+
 def left_skew(a, loc, size=500):
     r = skewnorm.rvs(a = a , loc=loc, size=size) 
     r = r - min(r)     
@@ -162,6 +172,10 @@ with model_path.open('wb') as file:
 
     pickle.dump(model, file)
 
+# the dashboard serves the NumPy export of the pickle while it is
+# current, keep it in step so it does not fall back to scikit-learn
+export_model(model_path)
+
 
 db_path = cwd.parent / 'python-package' / 'employee_events' / 'employee_events.db'
 
@@ -172,4 +186,20 @@ team.to_sql('team', connection, if_exists='replace')
 notes.to_sql('notes', connection, if_exists='replace')
 events.to_sql('employee_events', connection, if_exists='replace')
 
-connection.close()
\ No newline at end of file
+# the tables were replaced along with their indexes,
+# so every migration needs to run again
+connection.execute('PRAGMA user_version = 0')
+
+# the stored scores belong to the old data and model
+connection.execute('DROP TABLE IF EXISTS risk_scores')
+
+connection.close()
+
+# to_sql creates no keys or indexes, add them
+migrate(db_path)
+
+# pre-aggregate the events read by the dashboard
+rebuild_rollups(db_path)
+
+# score every employee and team with the new model
+refresh_risk_scores(model_server.predict, model_server.version, db_path, rebuild=True)
@@ -0,0 +1,32 @@
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+from employee_events.sql_execution import db_path
+
+# the report components are imported the same way dashboard.py does
+sys.path.insert(0, str(Path(__file__).parent.parent / 'report'))
+
+
+class Entity:
+    """
+    Stand-in for Employee or Team in components that only read its `name`
+    """
+    name = 'employee'
+
+
+@pytest.fixture
+def entity():
+    return Entity()
+
+
+@pytest.fixture
+def db_copy(tmp_path):
+    """
+    Path to a copy of the packaged database the test may change
+    """
+    path = tmp_path / 'employee_events.db'
+    shutil.copy(db_path, path)
+    return path
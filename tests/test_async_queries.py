@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+from employee_events import Employee, QueryMixin
+from employee_events.sql_execution import pool
+
+
+def test_async_results_match_sync():
+
+    employee = Employee()
+
+    async def fetch():
+        return await asyncio.gather(employee.aevent_counts(1), employee.anames())
+
+    counts, names = asyncio.run(fetch())
+    assert counts.equals(employee.event_counts(1))
+    assert names == employee.names()
+
+
+def test_throughput_scales_with_clients(monkeypatch):
+
+    # stand in for a database that takes 50ms to answer,
+    # so the test measures overlap rather than cpu speed
+    pandas_query = QueryMixin.pandas_query
+
+    def slow_query(self, sql_query, params=(), dtypes=None):
+        time.sleep(0.05)
+        return pandas_query(self, sql_query, params, dtypes)
+
+    monkeypatch.setattr(QueryMixin, 'pandas_query', slow_query)
+
+    employee = Employee()
+    sql = employee.statement(employee.event_counts_sql)
+    requests = 8
+
+    async def client(n_requests):
+        for _ in range(n_requests):
+            await employee.apandas_query(sql, (1,))
+
+    def throughput(clients):
+        async def run():
+            await asyncio.gather(*(client(requests // clients) for _ in range(clients)))
+
+        start = time.perf_counter()
+        asyncio.run(run())
+        return requests / (time.perf_counter() - start)
+
+    single = throughput(1)
+    concurrent = throughput(pool.max_size)
+
+    assert concurrent > single * 2.5
+
+
+def test_event_loop_is_not_blocked(monkeypatch):
+
+    monkeypatch.setattr(QueryMixin, 'pandas_query', lambda self, sql_query, params=(), dtypes=None: time.sleep(0.2))
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        await Employee().apandas_query('SELECT 1')
+        task.cancel()
+        return ticks
+
+    assert asyncio.run(run()) > 5
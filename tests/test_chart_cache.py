@@ -0,0 +1,90 @@
+import threading
+import time
+
+from base_components.chart_cache import ChartCache
+
+
+def test_memory_tier_renders_once():
+
+    cache = ChartCache(max_bytes=1024)
+    renders = []
+
+    def render():
+        renders.append(1)
+        return b'png'
+
+    assert cache.get_or_render(('LineChart', 'employee', '1'), render) == b'png'
+    assert cache.get_or_render(('LineChart', 'employee', '1'), render) == b'png'
+    assert len(renders) == 1
+
+
+def test_renders_of_one_key_never_overlap():
+
+    # images larger than the memory tier are never stored, so every
+    # caller renders, one at a time on the same key lock
+    cache = ChartCache(max_bytes=1)
+    rendering = []
+    overlaps = []
+
+    def render():
+        rendering.append(1)
+        overlaps.append(len(rendering))
+        time.sleep(0.02)
+        rendering.pop()
+        return b'png'
+
+    threads = [
+        threading.Thread(target=cache.get_or_render, args=('key', render))
+        for _ in range(8)
+        ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert overlaps == [1] * 8
+    assert cache._rendering == {}
+
+
+def test_concurrent_misses_wait_for_one_render():
+
+    cache = ChartCache(max_bytes=1024)
+    renders = []
+
+    def render():
+        renders.append(1)
+        time.sleep(0.05)
+        return b'png'
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_render('key', render)))
+        for _ in range(8)
+        ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [b'png'] * 8
+    assert len(renders) == 1
+    assert cache._rendering == {}
+
+
+def test_memory_tier_is_bounded_by_bytes():
+
+    cache = ChartCache(max_bytes=10)
+    cache.get_or_render('a', lambda: b'x' * 6)
+    cache.get_or_render('b', lambda: b'x' * 6)
+
+    assert cache.get('a') is None
+    assert cache.stats()['memory_evictions'] == 1
+
+
+def test_disk_tier_survives_a_new_cache(tmp_path):
+
+    ChartCache(disk_dir=tmp_path).get_or_render('key', lambda: b'png')
+
+    cache = ChartCache(disk_dir=tmp_path)
+    assert cache.get('key') == b'png'
+    assert cache.stats()['disk_hits'] == 1
@@ -0,0 +1,101 @@
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from base_components import MatplotlibViz
+from base_components.chart_renderers import (
+    NO_DATA_COLOR, RISK_COLORS, get_renderer, risk_color, renderers,
+    )
+
+
+SVG = '{http://www.w3.org/2000/svg}'
+
+
+class Chart(MatplotlibViz):
+
+    figsize = (6, 4)
+
+    def __init__(self, chart_kind, renderer_name=None):
+        self.chart_kind = chart_kind
+        self.renderer_name = renderer_name
+
+
+def test_svg_line_chart():
+
+    data = {
+        'title': 'Employee Cumulative Events',
+        'dates': np.array(['2024-01-01', '2024-01-02', '2024-01-05'], dtype='datetime64[ns]'),
+        'Positive': np.array([1, 3, 6]),
+        'Negative': np.array([0, 1, 1]),
+        }
+
+    svg = ET.fromstring(renderers['svg'].render(Chart('line'), data))
+
+    assert svg.get('width') == '300' and svg.get('height') == '200'
+    lines = svg.findall(f'{SVG}polyline')
+    assert [len(line.get('points').split()) for line in lines] == [3, 3]
+
+    # solid lines, as matplotlib draws them
+    assert all(line.get('stroke-dasharray') is None for line in lines)
+
+    labels = [t.text for t in svg.iter(f'{SVG}text')]
+    assert 'Employee Cumulative Events' in labels
+    assert 'Cumulative Count Intensity' in labels
+    assert [rect.get('fill') for rect in svg.findall(f'{SVG}rect')] == ['url(#counts)']
+
+
+def test_svg_line_chart_without_events():
+
+    data = {'title': 'Team Cumulative Events', 'dates': np.array([], dtype='datetime64[ns]'),
+            'Positive': np.array([]), 'Negative': np.array([])}
+
+    ET.fromstring(renderers['svg'].render(Chart('line'), data))
+
+
+def test_svg_bar_chart():
+
+    svg = ET.fromstring(renderers['svg'].render(Chart('bar'), {'pred': 0.25}))
+
+    bar = svg.findall(f'{SVG}rect')[0]
+    assert bar.get('fill') == risk_color(0.25)
+    assert '25.00%' in [t.text for t in svg.iter(f'{SVG}text')]
+
+
+def test_svg_bar_chart_without_risk():
+
+    svg = ET.fromstring(renderers['svg'].render(Chart('bar'), {'pred': float('nan')}))
+
+    bar = svg.findall(f'{SVG}rect')[0]
+    assert float(bar.get('width')) == 0
+    assert bar.get('fill') == NO_DATA_COLOR
+    assert 'No data' in [t.text for t in svg.iter(f'{SVG}text')]
+
+
+def test_risk_color_scale():
+
+    assert risk_color(0) == RISK_COLORS[0]
+    assert risk_color(1) == RISK_COLORS[-1]
+    assert risk_color(0.5) == RISK_COLORS[5]
+    assert risk_color(2) == RISK_COLORS[-1]
+
+
+def test_renderers_must_implement_render():
+
+    import pytest
+    from base_components.chart_renderers import ChartRenderer
+
+    class Incomplete(ChartRenderer):
+        name = 'incomplete'
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_renderer_selection():
+
+    assert get_renderer(Chart('line', 'svg')).name == 'svg'
+    assert get_renderer(Chart('line', 'matplotlib')).name == 'matplotlib'
+
+    # kinds the svg renderer cannot draw fall back to matplotlib
+    assert get_renderer(Chart(None, 'svg')).name == 'matplotlib'
+    assert get_renderer(Chart('line', 'unknown')).name == 'matplotlib'
@@ -0,0 +1,109 @@
+import asyncio
+import time
+
+import pytest
+
+from fasthtml.common import Div, to_xml
+from base_components import BaseComponent
+from base_components.fragment_cache import fragment_cache
+from combined_components import CombinedComponent, FormGroup
+
+
+class Slow(BaseComponent):
+
+    def __init__(self, label, delay=0.0, fail=False):
+        self.label = label
+        self.delay = delay
+        self.fail = fail
+
+    def build_component(self, entity_id, model):
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f'{self.label} failed')
+        return Div(self.label)
+
+
+class Page(CombinedComponent):
+
+    def __init__(self, *children, concurrent=True, cacheable=False):
+        self.children = list(children)
+        self.concurrent = concurrent
+        self.cacheable = cacheable
+
+
+def test_children_build_concurrently_in_order(entity):
+
+    page = Page(Slow('first', 0.3), Slow('second', 0.1), Slow('third', 0.2))
+
+    start = time.perf_counter()
+    html = to_xml(asyncio.run(page.acall(1, entity)))
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.5
+    assert html.index('first') < html.index('second') < html.index('third')
+
+
+def test_sequential_mode(entity):
+
+    page = Page(Slow('first', 0.1), Slow('second', 0.1), concurrent=False)
+
+    start = time.perf_counter()
+    html = to_xml(asyncio.run(page.acall(1, entity)))
+
+    assert time.perf_counter() - start >= 0.2
+    assert html.index('first') < html.index('second')
+
+
+@pytest.mark.parametrize('concurrent', [True, False])
+def test_failing_child_is_isolated(concurrent, capsys, entity):
+
+    page = Page(Slow('first'), Slow('broken', fail=True), Slow('third'), concurrent=concurrent)
+
+    html = to_xml(asyncio.run(page.acall(1, entity)))
+
+    assert 'first' in html and 'third' in html
+    assert 'section-error' in html
+    assert 'broken failed' in capsys.readouterr().err
+
+
+def test_failed_fragment_is_not_cached(entity):
+
+    broken = Slow('broken', fail=True)
+    page = Page(Slow('first'), broken, cacheable=True)
+
+    asyncio.run(page.acall(1, entity))
+    broken.fail = False
+    html = to_xml(asyncio.run(page.acall(1, entity)))
+
+    assert 'section-error' not in html
+    fragment_cache.invalidate(page)
+
+
+def test_nested_failure_is_not_cached(entity):
+
+    broken = Slow('broken', fail=True)
+    inner = Page(Slow('inner'), broken)
+    page = Page(Slow('first'), inner, cacheable=True)
+
+    fragment, errors = asyncio.run(page.abuild(1, entity))
+
+    assert errors == [broken]
+    assert fragment_cache.get(page, 1, entity) is None
+
+    broken.fail = False
+    html = to_xml(asyncio.run(page.acall(1, entity)))
+
+    assert 'section-error' not in html and 'broken' in html
+    fragment_cache.invalidate(page)
+
+
+def test_form_group_keeps_its_button(entity):
+
+    class Form(FormGroup):
+        children = [Slow('field', fail=True)]
+
+    form = Form()
+
+    html = to_xml(asyncio.run(form.acall(1, entity)))
+
+    assert 'section-error' in html and '<button>Submit</button>' in html
@@ -0,0 +1,223 @@
+import re
+
+import pytest
+
+
+@pytest.fixture(scope='module')
+def client():
+    from starlette.testclient import TestClient
+    import dashboard
+
+    return TestClient(dashboard.app)
+
+
+def chart_urls(client, model_name, entity_id):
+    fragment = client.get(f'/fragment/visualizations/{model_name}/{entity_id}').text
+    return [url.replace('&amp;', '&') for url in re.findall(r'<img src="([^"]*)"', fragment)]
+
+
+def test_page_loads_slow_sections_lazily(client):
+
+    page = client.get('/employee/1').text
+
+    assert 'Employee Performance' in page
+    assert 'name="user-selection"' in page
+    assert 'hx-get="/fragment/visualizations/employee/1"' in page
+    assert 'hx-get="/fragment/notes/employee/1"' in page
+    assert '<img' not in page
+
+
+def test_ready_once_warm(client, monkeypatch):
+
+    import dashboard
+    from concurrent.futures import Future
+    from starlette.testclient import TestClient
+
+    # importing the app does not warm it up, starting it does
+    monkeypatch.setattr(dashboard, 'warmup', None)
+    assert client.get('/ready').status_code == 503
+
+    with TestClient(dashboard.app) as started:
+        dashboard.warmup.result()
+        ready = started.get('/ready')
+        assert ready.status_code == 200
+        assert ready.json() == {'ready': True, 'model_version': dashboard.model_server.version}
+
+    monkeypatch.setattr(dashboard, 'warmup', Future())
+    assert client.get('/ready').status_code == 503
+
+    failed = Future()
+    failed.set_exception(RuntimeError('no model'))
+    monkeypatch.setattr(dashboard, 'warmup', failed)
+    assert client.get('/ready').json()['ready'] is False
+
+
+def test_model_watcher_runs_with_the_app():
+
+    from starlette.testclient import TestClient
+    import dashboard
+
+    assert dashboard.model_server._watcher is None
+
+    with TestClient(dashboard.app):
+        assert dashboard.model_server._watcher.is_alive()
+
+    assert dashboard.model_server._watcher is None
+
+
+def test_fragments(client):
+
+    notes = client.get('/fragment/notes/team/1', headers={'HX-Request': 'true'})
+    assert notes.status_code == 200
+    assert notes.text.lstrip().startswith('<table>')
+
+    assert client.get('/fragment/unknown/team/1').status_code == 404
+    assert client.get('/fragment/notes/unknown/1').status_code == 404
+
+
+def test_failing_fragment_returns_an_error_message(client, monkeypatch):
+
+    import dashboard
+
+    def broken(entity_id, model):
+        raise RuntimeError('broken section')
+
+    monkeypatch.setattr(dashboard.sections['notes'], 'acall', broken)
+    response = client.get('/fragment/notes/team/1')
+
+    assert response.status_code == 200
+    assert 'section-error' in response.text
+
+
+def test_charts_are_linked_not_inlined(client):
+
+    page = client.get('/fragment/visualizations/employee/1').text
+    urls = chart_urls(client, 'employee', 1)
+
+    assert 'base64' not in page
+    assert [url.split('/')[2] for url in urls] == ['line', 'bar']
+
+
+def test_chart_images_are_cacheable(client):
+
+    url = chart_urls(client, 'team', 1)[0]
+
+    image = client.get(url)
+    assert image.status_code == 200
+    assert image.headers['content-type'] == 'image/svg+xml'
+    assert 'immutable' in image.headers['cache-control']
+
+    revalidated = client.get(url, headers={'If-None-Match': image.headers['etag']})
+    assert revalidated.status_code == 304
+
+
+def test_model_swap_redraws_risk_charts(client, monkeypatch):
+
+    import dashboard
+    from base_components.chart_cache import chart_cache
+
+    server = dashboard.model_server
+    line_url, bar_url = chart_urls(client, 'employee', 2)
+    assert client.get(bar_url).status_code == 200
+
+    chart = dashboard.BarChart()
+    old_key = chart.cache_key(2, dashboard.Employee())
+    assert chart_cache.get(old_key) is not None
+
+    # what a reload does once the new model is validated
+    old_version = server.version
+    monkeypatch.setattr(server, '_current', (server.model, 'retrained'))
+    for listener in server.listeners:
+        listener(old_version, 'retrained')
+
+    assert chart_cache.get(old_key) is None
+
+    new_line_url, new_bar_url = chart_urls(client, 'employee', 2)
+    assert new_line_url == line_url
+    assert new_bar_url != bar_url
+
+
+def test_risk_chart_for_an_entity_without_events(client):
+
+    import dashboard
+
+    bar_url = chart_urls(client, 'employee', 999999)[1]
+
+    image = client.get(bar_url)
+    assert image.status_code == 200
+    assert b'No data' in image.content
+
+    # the matplotlib drawing handles it too
+    chart = dashboard.BarChart()
+    png = chart.draw_png(chart.component_data(999999, dashboard.Employee()))
+    assert png.startswith(b'\x89PNG')
+
+
+@pytest.mark.parametrize('url', [
+    '/employee/abc',
+    '/team/abc',
+    '/fragment/visualizations/employee/abc',
+    '/notes/employee/abc?cursor=1',
+    '/notes/team/abc/all',
+    '/chart/bar/employee/abc.svg',
+])
+def test_non_numeric_ids_are_not_found(client, url):
+
+    assert client.get(url).status_code == 404
+
+
+def test_chart_extension_must_match_renderer(client):
+
+    url = chart_urls(client, 'employee', 1)[0]
+
+    assert client.get(url.replace('.svg', '.png')).status_code == 404
+
+
+def test_notes_table_keeps_the_base_paging_api():
+
+    import dashboard
+
+    table = dashboard.NotesTable()
+    model = dashboard.Team()
+    data = model.notes(1)
+
+    # offset paging over a data frame, as for every DataTable
+    rows = table.page_rows(1, model, data, offset=len(data) - 3)
+    assert len(rows) == 3
+
+    page, cursor = model.notes_page(1, table.max_rows)
+    assert len(table.cursor_rows(1, model, page, cursor)) == table.max_rows + 1
+
+
+def test_all_notes_are_streamed(client):
+
+    from employee_events import Team
+
+    notes = Team().notes(1)
+    page = client.get('/notes/team/1/all')
+
+    assert page.status_code == 200
+    assert page.text.count('<tr>') == len(notes) + 1
+    assert client.get('/notes/unknown/1/all').status_code == 404
+
+
+def test_filters_render_only_the_current_entity(client):
+
+    page = client.get('/employee/3').text
+    select = re.search(r'<select name="user-selection".*?</select>', page, re.S).group()
+
+    assert select.count('<option') == 1
+    assert 'value="3" selected' in select
+
+
+def test_search(client):
+
+    from employee_events import Employee
+
+    name, entity_id = Employee().names()[0]
+    results = client.get(f'/search/employee?q={name.split()[0]}', headers={'HX-Request': 'true'})
+
+    assert results.status_code == 200
+    assert f'<option value="{entity_id}">{name}</option>' in results.text
+    assert client.get('/search/employee?q=&limit=2', headers={'HX-Request': 'true'}).text.count('<option') == 2
+    assert client.get('/search/unknown?q=a').status_code == 404
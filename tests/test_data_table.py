@@ -0,0 +1,73 @@
+import re
+
+import pandas as pd
+import pytest
+
+from fasthtml.common import to_xml
+from base_components import DataTable
+
+
+class NumbersTable(DataTable):
+
+    chunk_rows = 4
+
+    def __init__(self, n_rows, max_rows=None):
+        self.n_rows = n_rows
+        self.max_rows = max_rows
+
+    def component_data(self, entity_id, model):
+        return pd.DataFrame({'number': range(self.n_rows), 'square': [n * n for n in range(self.n_rows)]})
+
+
+class PagedNumbersTable(NumbersTable):
+
+    def more_url(self, entity_id, model, after):
+        return f'/numbers/{entity_id}?offset={after}'
+
+
+def row_count(html):
+    return len(re.findall(r'<tr>', html)) - 1
+
+
+def test_all_rows_without_cap(entity):
+
+    html = to_xml(NumbersTable(10)(1, entity))
+
+    assert row_count(html) == 10
+    assert 'Showing' not in html
+
+
+def test_row_cap_without_pages(entity):
+
+    html = to_xml(NumbersTable(10, max_rows=3)(1, entity))
+
+    assert row_count(html) == 4
+    assert 'Showing the first 3 rows' in html
+
+
+def test_row_cap_with_pages(entity):
+
+    table = PagedNumbersTable(10, max_rows=3)
+    data = table.component_data(1, entity)
+
+    html = to_xml(table(1, entity))
+    assert 'hx-get="/numbers/1?offset=3"' in html
+
+    # the last page has no "load more" row
+    last_page = table.page_rows(1, entity, data, offset=9)
+    assert len(last_page) == 1
+
+
+@pytest.mark.parametrize('n_rows', [0, 3, 4, 10])
+def test_stream_matches_table(n_rows, entity):
+
+    table = NumbersTable(n_rows)
+    chunks = list(table.stream(1, entity))
+
+    # header chunk, one chunk per 4 rows (at least one), closing tag
+    assert len(chunks) == 2 + max(-(-n_rows // 4), 1)
+
+    html = ''.join(chunks)
+    assert html.startswith('<table>') and html.endswith('</table>')
+    assert row_count(html) == n_rows
+    assert re.sub(r'\s', '', html) == re.sub(r'\s', '', to_xml(table(1, entity)))
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from fasthtml.common import Div, to_xml
+from base_components import BaseComponent
+from base_components import fragment_cache as fragment_cache_module
+from base_components.fragment_cache import fragment_cache
+from combined_components import CombinedComponent
+
+
+class Counter(BaseComponent):
+
+    def __init__(self, cacheable):
+        self.cacheable = cacheable
+        self.builds = 0
+
+    def build_component(self, entity_id, model):
+        self.builds += 1
+        return Div(f'{model.name} {entity_id}')
+
+
+class Page(CombinedComponent):
+
+    cacheable = True
+
+    def __init__(self):
+        self.children = [Counter(cacheable=False)]
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    fragment_cache.invalidate()
+    yield
+    fragment_cache.invalidate()
+
+
+def test_cacheable_component_builds_once(entity):
+
+    component = Counter(cacheable=True)
+
+    first = component(1, entity)
+    second = component(1, entity)
+
+    assert component.builds == 1
+    assert str(first) == str(second) == to_xml(Div('employee 1'))
+
+    component(2, entity)
+    assert component.builds == 2
+
+
+def test_component_is_not_cached_by_default(entity):
+
+    component = Counter(cacheable=False)
+    component(1, entity)
+    component(1, entity)
+
+    assert component.builds == 2
+
+
+def test_data_version_change_rebuilds(monkeypatch, entity):
+
+    component = Counter(cacheable=True)
+    component(1, entity)
+
+    monkeypatch.setattr(fragment_cache_module, 'data_version', lambda: ('changed',))
+    component(1, entity)
+
+    assert component.builds == 2
+
+
+def test_invalidate(entity):
+
+    first, second = Counter(cacheable=True), Counter(cacheable=True)
+    for component in (first, second):
+        component(1, entity)
+        component(2, entity)
+
+    assert fragment_cache.invalidate(first, entity_id=1) == 1
+    assert fragment_cache.invalidate('Counter') == 3
+
+    first(1, entity)
+    assert first.builds == 3
+
+
+def test_combined_component_async_path_is_cached(entity):
+
+    page = Page()
+    child = page.children[0]
+
+    first = asyncio.run(page.acall(1, entity))
+    second = page(1, entity)
+
+    assert child.builds == 1
+    assert str(first) == str(second)
@@ -0,0 +1,99 @@
+import json
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from employee_events import Employee
+from linear_model import LogisticScorer, export_model, load_scorer
+from model_serving import FEATURES
+from utils import load_model, model_path, model_json_path
+
+
+@pytest.fixture(scope='module')
+def model():
+    return load_model()
+
+
+@pytest.fixture(scope='module')
+def scorer():
+    return LogisticScorer.from_json(model_json_path)
+
+
+def test_export_is_current():
+    # assets/model.json must be re-exported whenever model.pkl changes
+    assert isinstance(load_scorer(), LogisticScorer)
+
+
+def test_scorer_matches_sklearn_on_model_data(model, scorer):
+
+    ids = [int(id) for _, id in Employee().names()]
+    features = Employee().model_data_many(ids)[FEATURES]
+
+    expected = model.predict_proba(features)
+    actual = scorer.predict_proba(features)
+
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual, expected, rtol=1e-12, atol=1e-15)
+
+
+def test_scorer_matches_sklearn_on_random_features(model, scorer):
+
+    rng = np.random.default_rng(0)
+    features = pd.DataFrame(rng.integers(0, 10_000, size=(500, 2)), columns=FEATURES)
+
+    np.testing.assert_allclose(
+        scorer.predict_proba(features),
+        model.predict_proba(features),
+        rtol=1e-12, atol=1e-15,
+        )
+
+
+def test_scorer_reads_dataframes_by_column_name(scorer):
+
+    features = pd.DataFrame({'negative_events': [5, 0], 'positive_events': [0, 5]})
+
+    np.testing.assert_array_equal(
+        scorer.predict_proba(features),
+        scorer.predict_proba(features[FEATURES].to_numpy()),
+        )
+
+
+def test_scorer_does_not_overflow(scorer):
+
+    probabilities = scorer.predict_proba(np.array([[1e9, 0], [0, 1e9]]))
+
+    assert np.isfinite(probabilities).all()
+    np.testing.assert_allclose(probabilities.sum(axis=1), 1)
+
+
+def test_load_scorer_falls_back_to_pickle(tmp_path):
+
+    source = tmp_path / 'model.pkl'
+    exported = tmp_path / 'model.json'
+    shutil.copy(model_path, source)
+
+    # no export yet
+    assert not isinstance(load_scorer(source, exported), LogisticScorer)
+
+    export_model(source, exported)
+    assert isinstance(load_scorer(source, exported), LogisticScorer)
+
+    # export made from another pickle
+    stale = json.loads(exported.read_text())
+    stale['source_sha256'] = '0' * 64
+    exported.write_text(json.dumps(stale))
+    assert not isinstance(load_scorer(source, exported), LogisticScorer)
+
+
+def test_export_rejects_other_models(tmp_path):
+
+    import pickle
+    from sklearn.tree import DecisionTreeClassifier
+
+    source = tmp_path / 'model.pkl'
+    source.write_bytes(pickle.dumps(DecisionTreeClassifier().fit([[0], [1]], [0, 1])))
+
+    with pytest.raises(ValueError):
+        export_model(source, tmp_path / 'model.json')
@@ -0,0 +1,88 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from base_components import MatplotlibViz, process_renderer
+
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+class StepChart(MatplotlibViz):
+
+    figsize = (1, 1)
+
+    def component_data(self, entity_id, model):
+        # every entity gets a different line and title,
+        # so charts that mix state render differently
+        return {
+            'title': f'{model.name} {entity_id}',
+            'steps': [entity_id * step % 7 for step in range(10)],
+            }
+
+    def visualization(self, data, fig, ax):
+        ax.plot(range(10), data['steps'])
+        ax.set_title(data['title'])
+        fig.suptitle(data['title'])
+
+
+@pytest.fixture(scope='module')
+def chart():
+    return StepChart()
+
+
+def test_render_png(chart, entity):
+
+    image = chart.render_image(1, entity)
+
+    assert image.startswith(PNG_SIGNATURE)
+
+
+def test_concurrent_renders_match_sequential(chart, entity):
+
+    entity_ids = list(range(200))
+
+    expected = {entity_id: chart.render_image(entity_id, entity) for entity_id in entity_ids[:20]}
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        images = list(executor.map(lambda entity_id: chart.render_image(entity_id, entity), entity_ids))
+
+    assert all(image.startswith(PNG_SIGNATURE) for image in images)
+    for entity_id, image in expected.items():
+        assert images[entity_id] == image
+
+
+def test_renders_leave_no_pyplot_figures(chart, entity):
+
+    import matplotlib.pyplot as plt
+
+    chart.render_image(1, entity)
+
+    assert plt.get_fignums() == []
+
+
+def test_process_renderer_matches_in_process(chart, entity):
+
+    expected = [chart.render_image(entity_id, entity) for entity_id in range(4)]
+
+    renderer = process_renderer.configure(2)
+    try:
+        images = [renderer.submit(chart, chart.component_data(entity_id, entity)) for entity_id in range(4)]
+        assert [image.result() for image in images] == expected
+
+        # render_image goes through the workers once they are configured
+        assert chart.render_image(0, entity) == expected[0]
+        # prerenders run on the renderer's own threads
+        # and land in the chart cache
+        future = chart.prerender(2, entity)
+        assert future.result() == chart.image(2, entity)
+    finally:
+        process_renderer.configure(0)
+
+
+def test_prerender_only_with_render_processes(entity):
+
+    assert process_renderer.renderer is None
+    assert StepChart().prerender(1, entity) is None
+
+    assert process_renderer.renderer is None
@@ -0,0 +1,178 @@
+import pickle
+import shutil
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from employee_events import Employee, Team
+from model_serving import ModelServer, model_server
+from utils import load_model, model_path
+
+
+def test_model_loads_lazily_and_once():
+
+    loads = []
+
+    def slow_loader(path):
+        loads.append(1)
+        time.sleep(0.1)
+        return load_model(path)
+
+    server = ModelServer(loader=slow_loader)
+    assert not server.loaded
+
+    threads = [threading.Thread(target=lambda: server.model) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert server.loaded
+    assert len(loads) == 1
+
+
+@pytest.mark.parametrize('model', [Employee(), Team()])
+def test_batch_scores_match_single_predictions(model):
+
+    predictor = load_model()
+    ids = [entity_id for _, entity_id in model.names()]
+
+    expected = [predictor.predict_proba(model.model_data(entity_id))[:, 1].mean() for entity_id in ids]
+    scores = model_server.score(ids, model)
+
+    assert list(scores.index) == ids
+    np.testing.assert_allclose(scores.to_numpy(), expected)
+
+
+def test_unknown_ids_score_nan():
+
+    scores = model_server.score(['1', 999_999], Employee())
+
+    assert not np.isnan(scores[1])
+    assert np.isnan(scores[999_999])
+
+
+@pytest.mark.parametrize('model', [Employee(), Team()])
+def test_stored_risk_matches_live_scores(model):
+
+    # the packaged database ships with current risk scores
+    ids = [entity_id for _, entity_id in model.names()]
+    stored = [model.risk_score(entity_id, model_server.version) for entity_id in ids]
+
+    assert None not in stored
+    np.testing.assert_allclose(stored, model_server.score(ids, model).to_numpy())
+    np.testing.assert_allclose([model_server.risk(entity_id, model) for entity_id in ids], stored)
+
+
+def test_risk_scores_live_for_another_model_version():
+
+    assert Employee().risk_score(1, 'another-model') is None
+    assert model_server.risk(1, Employee()) == model_server.score([1], Employee()).iloc[0]
+
+
+@pytest.fixture
+def model_copy(tmp_path):
+    path = tmp_path / 'model.pkl'
+    shutil.copy(model_path, path)
+    return path
+
+
+def write_model(path, scale):
+    # a "retrained" model with scaled coefficients
+    model = load_model()
+    model.coef_ = model.coef_ * scale
+    path.write_bytes(pickle.dumps(model))
+
+
+def test_reload_swaps_in_a_changed_model(model_copy):
+
+    server = ModelServer(source=model_copy)
+    swaps = []
+    server.listeners.append(lambda old, new: swaps.append((old, new)))
+
+    old_version = server.version
+    features = Employee().model_data_many([1, 2, 3])
+    old_risk = server.predict(features)
+
+    assert not server.reload()
+
+    write_model(model_copy, 10)
+    assert server.reload()
+
+    assert server.version != old_version
+    assert swaps == [(old_version, server.version)]
+    assert not np.allclose(server.predict(features), old_risk)
+
+
+@pytest.mark.parametrize('scale', [float('nan'), None])
+def test_reload_keeps_the_old_model_when_the_new_one_fails(model_copy, scale):
+
+    server = ModelServer(source=model_copy)
+    version = server.version
+
+    if scale is None:
+        model_copy.write_bytes(b'not a pickle')
+    else:
+        write_model(model_copy, scale)
+
+    assert not server.reload()
+    assert server.version == version
+
+
+def test_watcher_reloads_without_interrupting_requests(model_copy):
+
+    server = ModelServer(source=model_copy)
+    old_version = server.version
+    features = Employee().model_data_many([1, 2, 3])
+
+    errors = []
+    done = threading.Event()
+
+    def requests():
+        while not done.is_set():
+            try:
+                assert server.predict(features).shape == (3,)
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=requests) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+
+    server.watch(interval=0.01)
+    try:
+        write_model(model_copy, 2)
+
+        deadline = time.monotonic() + 10
+        while server.version == old_version and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        server.stop()
+        done.set()
+        for thread in threads:
+            thread.join()
+
+    assert server.version != old_version
+    assert errors == []
+
+
+def test_load_gives_up_on_a_file_that_keeps_changing(model_copy):
+
+    def loader(path):
+        # another deploy replaces the file during every load
+        loads.append(path)
+        write_model(path, len(loads) + 1)
+        return load_model(path)
+
+    loads = []
+    server = ModelServer(loader=loader, source=model_copy)
+
+    with pytest.raises(RuntimeError):
+        server.load()
+    assert len(loads) == server.load_attempts
+
+    # reload reports it and keeps serving nothing new
+    assert not server.reload()
+    assert not server.loaded
@@ -0,0 +1,67 @@
+from employee_events import Employee, Team, NameIndex
+from employee_events import name_search
+
+
+NAMES = [
+    ('Alex Martinez', 1),
+    ('Brittany Williams', 2),
+    ('Calvin Chen', 3),
+    ('Chen Alvarez', 4),
+    ('alex smith', 5),
+]
+
+
+def test_prefix_of_any_word():
+
+    index = NameIndex(NAMES)
+
+    assert index.search('chen') == [('Calvin Chen', 3), ('Chen Alvarez', 4)]
+    assert index.search('AL') == [('Alex Martinez', 1), ('alex smith', 5), ('Chen Alvarez', 4)]
+    assert index.search('alex  s') == [('alex smith', 5)]
+    assert index.search('zed') == []
+
+
+def test_limit_and_empty_query():
+
+    index = NameIndex(NAMES)
+
+    assert len(index.search('', limit=3)) == 3
+    assert len(index.search('')) == len(NAMES)
+    assert index.search('a', limit=1) == [('Alex Martinez', 1)]
+
+
+def test_each_entity_is_listed_once():
+
+    index = NameIndex([('Lee Lee', 1), ('Lee Park', 2)])
+
+    assert index.search('lee') == [('Lee Lee', 1), ('Lee Park', 2)]
+
+
+def test_name_lookup():
+
+    index = NameIndex(NAMES)
+
+    assert index.name(3) == 'Calvin Chen'
+    assert index.name('3') == 'Calvin Chen'
+    assert index.name('x') is None
+    assert len(index) == len(NAMES)
+
+
+def test_query_classes_search_their_names():
+
+    employee = Employee()
+    name, entity_id = employee.names()[0]
+
+    assert (name, entity_id) in employee.search_names(name.split()[-1], limit=50)
+    assert employee.display_name(entity_id) == name
+    assert all(found_id in dict(Team().names()).values() for _, found_id in Team().search_names(''))
+
+
+def test_index_is_rebuilt_when_the_database_changes(monkeypatch):
+
+    employee = Employee()
+    first = name_search.name_index(employee)
+    assert name_search.name_index(employee) is first
+
+    monkeypatch.setattr(name_search, 'data_version', lambda: ('changed',))
+    assert name_search.name_index(employee) is not first
@@ -0,0 +1,77 @@
+import os
+import time
+
+from employee_events import Employee, LRUCache, ResultCache
+from employee_events.result_cache import result_cache
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+
+    cache = LRUCache(max_size=2, ttl=10)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)          # evicts 'b', the least recently used
+
+    assert 'b' not in cache
+    assert cache.get('a') == 1
+    assert cache.stats()['evictions'] == 1
+
+    now = time.monotonic()
+    monkeypatch.setattr('employee_events.result_cache.time.monotonic', lambda: now + 11)
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1
+
+
+def test_result_cache_invalidates_on_db_change(tmp_path):
+
+    db = tmp_path / 'events.db'
+    db.write_bytes(b'v1')
+    cache = ResultCache(path=db)
+    cache.set('key', 'value')
+    assert cache.get('key') == 'value'
+
+    db.write_bytes(b'version 2')
+    os.utime(db, ns=(0, 0))
+    assert cache.get('key') is None
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_cached_queries_return_copies():
+
+    result_cache.clear()
+    employee = Employee()
+
+    first = employee.event_counts(1)
+    first.drop(first.index, inplace=True)
+    second = employee.event_counts(1)
+
+    assert not second.empty
+    assert result_cache.stats()['hits'] >= 1
+
+
+def test_results_of_database_errors_are_not_cached(monkeypatch):
+    import sqlite3
+    from contextlib import contextmanager
+
+    from employee_events import sql_execution
+
+    class LockedPool:
+        snapshot = None
+
+        @contextmanager
+        def connection(self):
+            raise sqlite3.OperationalError('database is locked')
+            yield
+
+    result_cache.clear()
+    employee = Employee()
+
+    with monkeypatch.context() as patch:
+        patch.setattr(sql_execution, 'pool', LockedPool())
+        assert employee.event_counts(1).empty
+        assert len(employee.names()) == 0
+
+    # the next call retries instead of serving the cached fallback
+    assert not employee.event_counts(1).empty
+    assert len(employee.names()) > 0
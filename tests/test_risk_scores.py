@@ -0,0 +1,87 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from employee_events.risk_scores import refresh_risk_scores
+
+
+def predict(data):
+    return (data['positive_events'] / (data['positive_events'] + data['negative_events'] + 1)).to_numpy()
+
+
+def stored_scores(path):
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute(
+            'SELECT entity_type, entity_id, risk, model_version, watermark FROM risk_scores'
+            ).fetchall()
+    finally:
+        conn.close()
+    return {(entity_type, entity_id): row for entity_type, entity_id, *row in rows}
+
+
+def expected_scores(path):
+    conn = sqlite3.connect(path)
+    try:
+        totals = pd.read_sql_query(
+            '''SELECT employee_id, team_id, SUM(positive_events) positive_events, SUM(negative_events) negative_events
+                FROM employee_events GROUP BY employee_id, team_id''', conn)
+    finally:
+        conn.close()
+
+    # employees are scored on their totals across teams,
+    # teams on the mean risk of their members' totals in the team
+    employee_totals = totals.groupby('employee_id')[['positive_events', 'negative_events']].sum()
+    employees = pd.Series(predict(employee_totals), index=employee_totals.index)
+    totals['risk'] = predict(totals)
+    teams = totals.groupby('team_id')['risk'].mean()
+    return {
+        **{('employee', int(id)): risk for id, risk in employees.items()},
+        **{('team', int(id)): risk for id, risk in teams.items()},
+        }
+
+
+def test_refresh_scores_every_entity_once(db_copy):
+
+    assert refresh_risk_scores(predict, 'v1', db_copy) == 30
+    assert refresh_risk_scores(predict, 'v1', db_copy) == 0
+
+    stored = stored_scores(db_copy)
+    expected = expected_scores(db_copy)
+    assert stored.keys() == expected.keys()
+    np.testing.assert_allclose([stored[key][0] for key in expected], list(expected.values()))
+    assert {version for _, version, _ in stored.values()} == {'v1'}
+
+
+def test_refresh_only_rescores_changed_entities(db_copy):
+
+    refresh_risk_scores(predict, 'v1', db_copy)
+
+    conn = sqlite3.connect(db_copy)
+    with conn:
+        conn.execute(
+            '''INSERT INTO employee_events (event_date, employee_id, team_id, positive_events, negative_events)
+                VALUES ('2099-01-01', 1, 1, 500, 0)'''
+            )
+        watermark = conn.execute('SELECT MAX(rowid) FROM employee_events').fetchone()[0]
+    conn.close()
+
+    # employee 1 and its team
+    assert refresh_risk_scores(predict, 'v1', db_copy) == 2
+
+    stored = stored_scores(db_copy)
+    rescored = {key for key, (_, _, stamp) in stored.items() if stamp == watermark}
+    assert rescored == {('employee', 1), ('team', 1)}
+
+    expected = expected_scores(db_copy)
+    np.testing.assert_allclose([stored[key][0] for key in expected], list(expected.values()))
+
+
+def test_new_model_version_rescores_everything(db_copy):
+
+    refresh_risk_scores(predict, 'v1', db_copy)
+
+    assert refresh_risk_scores(predict, 'v2', db_copy) == 30
+    assert {version for _, version, _ in stored_scores(db_copy).values()} == {'v2'}
+    assert refresh_risk_scores(predict, 'v2', db_copy, rebuild=True) == 30
@@ -0,0 +1,98 @@
+import sqlite3
+
+from employee_events import Employee, Team
+from employee_events.rollups import rebuild_rollups, refresh_rollups
+
+
+def rollup_matches_raw(conn):
+    rollup = conn.execute(
+        'SELECT team_id, event_date, positive_events, negative_events FROM team_daily_events ORDER BY 1, 2'
+        ).fetchall()
+    raw = conn.execute(
+        '''SELECT team_id, event_date, SUM(positive_events), SUM(negative_events)
+            FROM employee_events GROUP BY 1, 2 ORDER BY 1, 2'''
+        ).fetchall()
+    return rollup == raw
+
+
+# (raw table query, rollup query) pairs of the query classes
+# The single id queries are bound to one id, the *_many queries to all of them
+QUERY_PAIRS = [
+    ('event_counts_sql', 'event_counts_rollup_sql'),
+    ('model_data_sql', 'model_data_rollup_sql'),
+    ('event_counts_many_sql', 'event_counts_many_rollup_sql'),
+    ('model_data_many_sql', 'model_data_many_rollup_sql'),
+    ]
+
+
+def rollup_mismatches(conn):
+    """
+    Returns the (class, query, params) of every query whose
+    rollup result differs from its raw table result
+    """
+    mismatches = []
+
+    for query in (Employee(), Team()):
+        ids = [id for id, in conn.execute(query.statement('SELECT {name}_id FROM {name}'))]
+        # an id without events too
+        ids.append(max(ids) + 1)
+
+        for raw_sql, rollup_sql in QUERY_PAIRS:
+            if raw_sql.endswith('_many_sql'):
+                params = [(query.id_list(ids),)]
+            else:
+                params = [(id,) for id in ids]
+
+            for param in params:
+                raw = conn.execute(query.statement(getattr(query, raw_sql)), param).fetchall()
+                rollup = conn.execute(query.statement(getattr(query, rollup_sql)), param).fetchall()
+                if raw != rollup:
+                    mismatches.append((query.name, raw_sql, param))
+
+    return mismatches
+
+
+def test_refresh_only_adds_appended_rows(db_copy):
+
+    rebuild_rollups(db_copy)
+    assert refresh_rollups(db_copy) == 0
+
+    conn = sqlite3.connect(db_copy)
+    with conn:
+        conn.execute(
+            '''INSERT INTO employee_events (event_date, employee_id, team_id, positive_events, negative_events)
+                VALUES ('2099-01-01', 1, 1, 5, 2), ('2099-01-01', 2, 1, 1, 1)'''
+            )
+
+    assert not rollup_matches_raw(conn)
+    assert refresh_rollups(db_copy) == 2
+    assert rollup_matches_raw(conn)
+    conn.close()
+
+
+def test_queries_read_the_same_from_rollups(db_copy):
+
+    rebuild_rollups(db_copy)
+
+    conn = sqlite3.connect(db_copy)
+    assert rollup_mismatches(conn) == []
+
+    # new events on an existing day and on a new one,
+    # for employees of two teams, then an incremental refresh
+    employees = conn.execute(
+        'SELECT employee_id, team_id FROM employee ORDER BY employee_id LIMIT 3'
+        ).fetchall()
+    day = conn.execute('SELECT MAX(event_date) FROM employee_events').fetchone()[0]
+    with conn:
+        conn.executemany(
+            '''INSERT INTO employee_events (event_date, employee_id, team_id, positive_events, negative_events)
+                VALUES (?, ?, ?, ?, ?)''',
+            [(date, employee_id, team_id, 3, 1)
+             for employee_id, team_id in employees
+             for date in (day, '2099-01-01')],
+            )
+
+    assert rollup_mismatches(conn) != []
+    assert refresh_rollups(db_copy) == 2 * len(employees)
+    assert rollup_mismatches(conn) == []
+    conn.close()
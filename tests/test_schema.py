@@ -0,0 +1,68 @@
+import re
+import sqlite3
+
+import pytest
+
+from employee_events.schema import MIGRATIONS, check_query_plans, migrate, schema_version
+from employee_events.sql_execution import db_path
+
+
+# Indexes the migrations create, and those they create and later drop
+CREATED = {
+    name for _, statements in MIGRATIONS for statement in statements
+    for name in re.findall(r'CREATE (?:UNIQUE )?INDEX IF NOT EXISTS (\w+)', statement)
+    }
+DROPPED = {
+    name for _, statements in MIGRATIONS for statement in statements
+    for name in re.findall(r'DROP INDEX IF EXISTS (\w+)', statement)
+    }
+
+
+def schema(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute('SELECT type, name, sql FROM sqlite_master ORDER BY name').fetchall()
+    finally:
+        conn.close()
+
+
+def index_names(path):
+    return {name for kind, name, _ in schema(path) if kind == 'index'}
+
+
+@pytest.fixture
+def unmigrated_db(db_copy):
+    # the packaged database ships migrated, undo it
+    conn = sqlite3.connect(db_copy)
+    try:
+        for name in CREATED:
+            conn.execute(f'DROP INDEX IF EXISTS {name}')
+        conn.execute('PRAGMA user_version = 0')
+        conn.commit()
+    finally:
+        conn.close()
+    return db_copy
+
+
+def test_migrate_is_idempotent(unmigrated_db):
+
+    assert schema_version(unmigrated_db) == 0
+    assert not CREATED & index_names(unmigrated_db)
+
+    assert migrate(unmigrated_db) == [version for version, _ in MIGRATIONS]
+    assert schema_version(unmigrated_db) == MIGRATIONS[-1][0]
+
+    indexes = index_names(unmigrated_db)
+    assert CREATED - DROPPED <= indexes
+    assert not DROPPED & indexes
+
+    migrated = schema(unmigrated_db)
+    assert migrate(unmigrated_db) == []
+    assert schema(unmigrated_db) == migrated
+    assert schema_version(unmigrated_db) == MIGRATIONS[-1][0]
+
+
+def test_queries_do_not_scan_tables():
+
+    # the packaged database ships with the migrations applied
+    assert check_query_plans(db_path) == []
@@ -0,0 +1,247 @@
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from employee_events import Employee, Team, cache_stats, sql_execution
+from employee_events.connection_pool import ConnectionPool, PoolClosedError, PoolTimeoutError
+from employee_events.result_cache import data_version
+from employee_events.sql_execution import db_path, fetch_columns
+
+
+@pytest.fixture
+def pool():
+    pool = ConnectionPool(db_path, max_size=2, timeout=5)
+    yield pool
+    pool.close()
+
+
+def test_pool_reuses_connections(pool):
+
+    for _ in range(10):
+        with pool.connection() as conn:
+            conn.execute("SELECT 1").fetchall()
+
+    stats = pool.stats()
+    assert stats['opens'] == 1
+    assert stats['hits'] == 9
+
+
+def test_pool_connections_are_read_only(pool):
+
+    with pool.connection() as conn:
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("CREATE TABLE should_fail (x INTEGER)")
+
+
+def test_pool_is_bounded(pool):
+
+    held = [pool.acquire(), pool.acquire()]
+    released = threading.Timer(0.1, pool.release, args=(held.pop(),))
+    released.start()
+
+    # blocks until the timer hands a connection back
+    conn = pool.acquire()
+    pool.release(conn)
+    pool.release(held.pop())
+
+    stats = pool.stats()
+    assert stats['opens'] == 2
+    assert stats['waits'] == 1
+    assert stats['wait_time'] > 0
+
+
+def test_pool_timeout_is_an_sqlite_error():
+
+    pool = ConnectionPool(db_path, max_size=1, timeout=0.05)
+    held = pool.acquire()
+
+    with pytest.raises(PoolTimeoutError) as error:
+        pool.acquire()
+    assert isinstance(error.value, sqlite3.Error)
+
+    pool.release(held)
+    pool.close()
+
+
+def test_pool_close_wakes_waiting_callers():
+
+    pool = ConnectionPool(db_path, max_size=1, timeout=30)
+    held = pool.acquire()
+    errors = []
+
+    def wait():
+        try:
+            pool.acquire()
+        except Exception as error:
+            errors.append(error)
+
+    waiters = [threading.Thread(target=wait) for _ in range(3)]
+    for waiter in waiters:
+        waiter.start()
+    while pool._waiting < len(waiters):
+        time.sleep(0.01)
+
+    start = time.perf_counter()
+    pool.close()
+    for waiter in waiters:
+        waiter.join()
+
+    assert time.perf_counter() - start < 1
+    assert [type(error) for error in errors] == [PoolClosedError] * 3
+    pool.release(held)
+
+
+def test_pool_close(pool):
+
+    with pool.connection():
+        pass
+
+    pool.close()
+    assert pool.stats()['idle'] == 0
+
+    with pytest.raises(PoolClosedError):
+        pool.acquire()
+
+
+def test_queries_bind_ids_as_parameters():
+
+    employee = Employee()
+
+    # the id is bound as a value, never spliced into the sql
+    assert employee.username("1 OR 1=1") == []
+    assert employee.statement(employee.username_sql) is employee.statement(employee.username_sql)
+    assert employee.username(1) == [('Alex', 'Martinez')]
+
+
+def test_many_methods_match_single_entity_queries():
+
+    employee, team = Employee(), Team()
+    ids = [1, 2, 3]
+
+    counts = employee.event_counts_many(ids)
+    assert counts.employee_id.unique().tolist() == ids
+    for id in ids:
+        single = employee.event_counts(id)
+        batch = counts[counts.employee_id == id].drop(columns='employee_id').reset_index(drop=True)
+        assert batch.equals(single)
+
+    model_data = team.model_data_many(ids)
+    for id in ids:
+        single = team.model_data(id)
+        batch = model_data[model_data.team_id == id][['positive_events', 'negative_events']]
+        assert batch.reset_index(drop=True).equals(single)
+
+    notes = employee.notes_many(ids)
+    assert notes.employee_id.unique().tolist() == ids
+    for id in ids:
+        single = employee.notes(id)
+        batch = notes[notes.employee_id == id].drop(columns='employee_id').reset_index(drop=True)
+        assert batch.equals(single)
+
+
+def test_fetch_columns_fixes_dtypes():
+
+    conn = sqlite3.connect(':memory:')
+    cursor = conn.execute(
+        "SELECT 1 AS n, '2024-01-02' AS day, 'text' AS note, NULL AS missing "
+        "UNION ALL SELECT 2, '2024-01-03', 'more', 1.5"
+        )
+    columns = fetch_columns(cursor, {'day': 'datetime64[ns]'})
+
+    assert columns['n'].dtype == 'int64'
+    assert columns['day'].dtype == 'datetime64[ns]'
+    assert columns['note'].dtype == object
+    assert columns['missing'].dtype == object
+
+
+def test_dtype_conversion_errors_are_raised():
+
+    with pytest.raises(ValueError):
+        Employee().pandas_query("SELECT 'not a date' AS day", dtypes={'day': 'datetime64[ns]'})
+
+
+def test_notes_keyset_pagination():
+
+    team = Team()
+    pages, cursor = [], None
+    while True:
+        page, cursor = team.notes_page(1, 7, cursor)
+        pages.append(page)
+        if cursor is None:
+            break
+
+    assert len(pages) > 1
+    assert pd.concat(pages).reset_index(drop=True).equals(team.notes(1))
+    assert team.notes(1).note_date.is_monotonic_decreasing
+
+
+def test_fetch_notes_page_skips_the_result_cache():
+
+    team = Team()
+    expected, expected_cursor = team.notes_page(1, 7)
+
+    before = cache_stats()
+    page, cursor = team.fetch_notes_page(1, 7)
+    after = cache_stats()
+
+    assert page.equals(expected) and cursor == expected_cursor
+    assert (after['hits'], after['misses']) == (before['hits'], before['misses'])
+
+
+@pytest.mark.parametrize('mode', ['mmap', 'memory'])
+def test_serving_modes_return_the_same_data(mode):
+
+    disk = ConnectionPool(db_path)
+    other = ConnectionPool(db_path, mode=mode)
+    sql = "SELECT employee_id, SUM(positive_events) FROM employee_events GROUP BY employee_id"
+
+    with disk.connection() as disk_conn, other.connection() as other_conn:
+        assert disk_conn.execute(sql).fetchall() == other_conn.execute(sql).fetchall()
+
+    disk.close()
+    other.close()
+
+
+def test_unknown_serving_mode():
+
+    with pytest.raises(ValueError):
+        ConnectionPool(db_path, mode='tape')
+
+
+def test_memory_mode_caches_follow_the_snapshot(db_copy, monkeypatch):
+
+    monkeypatch.setattr(sql_execution, 'db_path', db_copy)
+    monkeypatch.setattr(sql_execution, 'pool', ConnectionPool(db_copy, mode='memory'))
+    count_sql = 'SELECT COUNT(*) FROM employee_events'
+
+    def served_count():
+        with sql_execution.pool.connection() as conn:
+            return conn.execute(count_sql).fetchone()[0]
+
+    count = served_count()
+    version = data_version(db_copy)
+
+    conn = sqlite3.connect(db_copy)
+    with conn:
+        conn.execute(
+            '''INSERT INTO employee_events (event_date, employee_id, team_id, positive_events, negative_events)
+                VALUES ('2099-01-01', 1, 1, 1, 0)'''
+            )
+    conn.close()
+
+    # the pool still serves the snapshot, so cached results stay valid
+    assert served_count() == count
+    assert data_version(db_copy) == version
+
+    # a new snapshot sees the change under a new version
+    old_pool = sql_execution.pool
+    sql_execution.configure()
+    try:
+        assert served_count() == count + 1
+        assert data_version(db_copy) != version
+    finally:
+        sql_execution.pool.close()
+        assert old_pool.closed
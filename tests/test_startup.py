@@ -0,0 +1,34 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+REPORT_DIR = Path(__file__).parent.parent / 'report'
+
+
+def modules_after_import(module, cwd=REPORT_DIR):
+    # import in a fresh interpreter, this one has loaded everything already
+    code = f"import sys, json; import {module}; print(json.dumps(sorted(sys.modules)))"
+    env = {**os.environ, 'DASHBOARD_MODEL_RELOAD_INTERVAL': '0'}
+    result = subprocess.run(
+        [sys.executable, '-c', code], cwd=cwd, env=env, capture_output=True, text=True, check=True,
+        )
+    return {name.split('.')[0] for name in json.loads(result.stdout.splitlines()[-1])}
+
+
+def test_dashboard_defers_matplotlib_and_sklearn():
+
+    modules = modules_after_import('dashboard')
+
+    assert 'dashboard' in modules
+    assert 'matplotlib' not in modules
+    assert 'sklearn' not in modules
+
+
+def test_employee_events_defers_pandas():
+
+    modules = modules_after_import('employee_events')
+
+    assert 'pandas' not in modules
+    assert 'numpy' not in modules